@@ -0,0 +1,172 @@
+from manifest import GENERATOR_VERSION, hash_file
+import hashlib
+import json
+import os
+import struct
+
+# Asset pipeline, None unless enabled. Static files are published under
+# names that contain a hash of their content, so they can be cached forever,
+# and images get their width and height so browsers can lay out pages before
+# they load.
+active = None
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+# Start of frame markers, which hold a JPEG's dimensions. C4, C8 and CC are
+# other segments that share the range.
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def probe_image(path):
+    # Returns (width, height) read from the image's header, or None for
+    # files that aren't in a format we know. Only a few bytes are read, apart
+    # from JPEGs where the size comes after any metadata segments.
+    with open(path, 'rb') as f:
+        header = f.read(30)
+        if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+            return struct.unpack(">II", header[16:24])
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", header[6:10])
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            return probe_webp(header)
+        if header[:2] == b"\xff\xd8":
+            f.seek(2)
+            return probe_jpeg(f)
+    return None
+
+def probe_webp(header):
+    chunk = header[12:16]
+    if chunk == b"VP8 " and header[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and header[20] == 0x2F:
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    return None
+
+def probe_jpeg(f):
+    # Walks the segments after the start of image marker until a frame header
+    while True:
+        byte = f.read(1)
+        if byte != b"\xff":
+            return None
+        marker = f.read(1)
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Markers without a segment
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+def fingerprint_path(path, digest):
+    # images/tom.png -> images/tom.1a2b3c4d.png
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest[:8]}{ext}"
+
+class AssetMap():
+    # Knows every static file by the root-relative URL pages use for it.
+    # Content hashes are kept per file along with its size and mtime, and
+    # image sizes per content hash, so a build where nothing changed reads
+    # none of the files.
+    def __init__(self, static_dir, cache_path=None):
+        self.static_dir = static_dir
+        self.cache_path = cache_path
+        # url -> {"source", "hash", "url", "width", "height"}
+        self.files = {}
+        self.stats = {}
+        self.probes = {}
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == GENERATOR_VERSION:
+                self.stats = data["stats"]
+                self.probes = data["probes"]
+        self.scan()
+
+    def file_hash(self, source):
+        stat = os.stat(source)
+        known = self.stats.get(source)
+        if known is not None and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+            return known[2]
+        digest = hash_file(source)
+        self.stats[source] = [stat.st_mtime_ns, stat.st_size, digest]
+        return digest
+
+    def scan(self):
+        stats = {}
+        for root, _, names in os.walk(self.static_dir):
+            for name in sorted(names):
+                source = os.path.join(root, name)
+                relative = os.path.relpath(source, self.static_dir).replace(os.sep, "/")
+                digest = self.file_hash(source)
+                stats[source] = self.stats[source]
+                entry = {"source": source, "hash": digest, "url": "/" + fingerprint_path(relative, digest)}
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    if digest not in self.probes:
+                        self.probes[digest] = probe_image(source)
+                    size = self.probes[digest]
+                    if size is not None:
+                        entry["width"], entry["height"] = size
+                self.files["/" + relative] = entry
+        # Forget files that are gone
+        self.stats = stats
+        used = set(entry["hash"] for entry in self.files.values())
+        self.probes = {digest: size for digest, size in self.probes.items() if digest in used}
+        digest = hashlib.sha256()
+        for url in sorted(self.files):
+            digest.update(f"{url}\0{self.files[url]['hash']}\0".encode())
+        # Changes whenever any asset URL does, for caches of rendered HTML
+        self.digest = digest.hexdigest()
+
+    def lookup(self, url):
+        # The asset a root-relative URL points at, ignoring any query or
+        # fragment, or None
+        path = url.split("#", 1)[0].split("?", 1)[0]
+        return self.files.get(path)
+
+    def rewrite(self, url):
+        # Root-relative URLs of static files become their fingerprinted URL
+        entry = self.lookup(url)
+        if entry is None:
+            return url
+        return entry["url"] + url[len(url.split("#", 1)[0].split("?", 1)[0]):]
+
+    def dest_path(self, relative):
+        # Where a file from the static directory is published
+        entry = self.files.get("/" + relative.replace(os.sep, "/"))
+        if entry is None:
+            return relative
+        return entry["url"][1:]
+
+    def hashes(self):
+        # Content hash of every static file, by source path
+        return {entry["source"]: entry["hash"] for entry in self.files.values()}
+
+    def save(self):
+        if self.cache_path is None:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": GENERATOR_VERSION, "stats": self.stats, "probes": self.probes}, f)
+        os.replace(tmp_path, self.cache_path)
+
+def enable(asset_map):
+    global active
+    active = asset_map
+    return active
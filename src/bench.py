@@ -0,0 +1,205 @@
+from generate import generate_pages_recursive
+from utils import markdown_to_html_node
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Benchmarks the Markdown pipeline and full builds against synthetic content
+# trees. Run with: bash bench.sh [--scale 0.1] [--save-baseline]
+
+BASELINE_PATH = "bench_baseline.json"
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet" /></head>
+  <body><article>{{ Content }}</article></body>
+</html>"""
+
+WORDS = "the quick brown fox jumps over lazy dog elf ring river hill tree song star".split()
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def inline_text(rng, count):
+    # A sentence with every kind of inline span
+    spans = [
+        lambda: words(rng, 3),
+        lambda: f"**{words(rng, 2)}**",
+        lambda: f"_{words(rng, 2)}_",
+        lambda: f"`{rng.choice(WORDS)}()`",
+        lambda: f"[{words(rng, 2)}](/blog/{rng.choice(WORDS)})",
+        lambda: f"![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png)",
+    ]
+    return " ".join(rng.choice(spans)() for _ in range(count))
+
+def page(rng, title, paragraphs=3, inline=4, code_lines=0, list_items=0, quotes=0):
+    blocks = [f"# {title}"]
+    for index in range(paragraphs):
+        if index % 5 == 0:
+            blocks.append(f"## {words(rng, 4)}")
+        blocks.append(f"{words(rng, 30)} {inline_text(rng, inline)}\n{words(rng, 20)}")
+    if code_lines:
+        blocks.append("```\n" + "\n".join(f"    {words(rng, 8)}" for _ in range(code_lines)) + "\n```")
+    if list_items:
+        blocks.append("\n".join(f"- {inline_text(rng, 2)}" for _ in range(list_items)))
+        blocks.append("\n".join(f"{index}. {words(rng, 6)}" for index in range(1, list_items + 1)))
+    if quotes:
+        blocks.append("\n".join(f"> {words(rng, 12)}" for _ in range(quotes)))
+    return "\n\n".join(blocks) + "\n"
+
+def corpus_pages(name, scale, rng):
+    # Yields (relative path, markdown) for each page of the named corpus
+    def count(n):
+        return max(1, int(n * scale))
+    if name == "many_small":
+        for index in range(count(2000)):
+            yield f"section{index % 20}/page{index}/index.md", page(rng, f"Page {index}", paragraphs=2, inline=2)
+    elif name == "few_huge":
+        for index in range(3):
+            yield f"huge{index}/index.md", page(rng, f"Huge {index}", paragraphs=count(5000), inline=6)
+    elif name == "deep_nesting":
+        for index in range(count(500)):
+            path = "/".join(f"level{depth}" for depth in range(index % 12 + 1))
+            yield f"{path}/page{index}/index.md", page(rng, f"Deep {index}")
+    elif name == "inline_heavy":
+        for index in range(count(200)):
+            yield f"inline/page{index}/index.md", page(rng, f"Inline {index}", paragraphs=20, inline=60)
+    elif name == "code_blocks":
+        for index in range(count(200)):
+            yield f"code/page{index}/index.md", page(rng, f"Code {index}", paragraphs=2, code_lines=400)
+    elif name == "long_lists":
+        for index in range(count(50)):
+            yield f"lists/page{index}/index.md", page(rng, f"Lists {index}", paragraphs=1, list_items=2000, quotes=200)
+    else:
+        raise ValueError(f"Unknown corpus {name}")
+
+CORPORA = ["many_small", "few_huge", "deep_nesting", "inline_heavy", "code_blocks", "long_lists"]
+
+def write_corpus(name, scale, root):
+    rng = random.Random(name)
+    content_dir = os.path.join(root, "content")
+    total_bytes = 0
+    pages = []
+    for relative_path, markdown in corpus_pages(name, scale, rng):
+        path = os.path.join(content_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(markdown)
+        total_bytes += len(markdown.encode())
+        pages.append(markdown)
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, 'w') as f:
+        f.write(TEMPLATE)
+    return content_dir, template_path, pages, total_bytes
+
+def run_pipeline(pages):
+    for markdown in pages:
+        markdown_to_html_node(markdown).to_html()
+
+def run_build(content_dir, template_path, dest_dir, jobs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_pages_recursive(content_dir, template_path, dest_dir, "/", jobs=jobs)
+
+def peak_memory(function, *args):
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def tree_memory(pages):
+    # Memory retained by the node trees of every page, held at the same time
+    tracemalloc.start()
+    try:
+        trees = [markdown_to_html_node(markdown) for markdown in pages]
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+def best_time(function, repeat, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def bench_corpus(name, scale, repeat, jobs):
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, template_path, pages, total_bytes = write_corpus(name, scale, root)
+        megabytes = total_bytes / 1e6
+        pipeline = best_time(run_pipeline, repeat, pages)
+        build = best_time(run_build, repeat, content_dir, template_path, os.path.join(root, "docs"), jobs)
+        return {
+            "pages": len(pages),
+            "megabytes": round(megabytes, 3),
+            "pipeline_pages_per_sec": round(len(pages) / pipeline, 1),
+            "pipeline_mb_per_sec": round(megabytes / pipeline, 3),
+            "build_pages_per_sec": round(len(pages) / build, 1),
+            "build_mb_per_sec": round(megabytes / build, 3),
+            "pipeline_peak_mb": round(peak_memory(run_pipeline, pages) / 1e6, 2),
+            "tree_mb": round(tree_memory(pages) / 1e6, 2),
+        }
+
+def compare(results, baseline, threshold):
+    # Returns the names of metrics that got slower than the baseline allows
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("pipeline_mb_per_sec", "build_mb_per_sec"):
+            if result[metric] < previous[metric] * (1 - threshold):
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Markdown pipeline on synthetic corpora")
+    parser.add_argument("corpora", nargs="*", help=f"corpora to run, out of {', '.join(CORPORA)}")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the size of every corpus")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    # Numbers are only comparable between runs at the same scale
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            data = json.load(f)
+        if data.get("scale") == args.scale:
+            baseline = data["corpora"]
+
+    results = {}
+    print(f"{'corpus':<14} {'pages':>6} {'MB':>7} {'pipe p/s':>9} {'pipe MB/s':>9} {'build p/s':>9} {'build MB/s':>10} {'peak MB':>8} {'tree MB':>8} {'vs base':>8}")
+    for name in args.corpora or CORPORA:
+        result = bench_corpus(name, args.scale, args.repeat, args.jobs)
+        results[name] = result
+        ratio = ""
+        if name in baseline:
+            ratio = f"{result['build_mb_per_sec'] / baseline[name]['build_mb_per_sec']:.2f}x"
+        print(f"{name:<14} {result['pages']:>6} {result['megabytes']:>7.2f} {result['pipeline_pages_per_sec']:>9.1f} {result['pipeline_mb_per_sec']:>9.3f} {result['build_pages_per_sec']:>9.1f} {result['build_mb_per_sec']:>10.3f} {result['pipeline_peak_mb']:>8.2f} {result['tree_mb']:>8.2f} {ratio:>8}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({"scale": args.scale, "corpora": results}, f, indent=1, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        sys.exit(f"Regressions against {args.baseline}: {', '.join(regressions)}")
+
+if __name__ == "__main__":
+    main()
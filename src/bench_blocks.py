@@ -0,0 +1,68 @@
+from utils import block_to_block_type, markdown_to_html_node, scan_block, BlockType
+import re
+import time
+
+# Micro-benchmarks for block classification on large lists and quotes,
+# against the multi-scan version scan_block replaced.
+# Run with: python3 src/bench_blocks.py
+
+def multi_scan_block_to_block_type(block):
+    lines = block.split('\n')
+    if len(lines) == 1 and re.match(r"^#{1,6} ", lines[0]):
+        return BlockType.HEADING
+    elif block.strip().startswith("```") and block.strip().endswith("```"):
+        return BlockType.CODE
+    elif all(line.startswith(">") and line != "" for line in lines):
+        return BlockType.QUOTE
+    elif all(line.startswith("- ") and line != "" for line in lines):
+        return BlockType.UNORDERED_LIST
+    elif all(line.startswith(f"{index}. ") and line != "" for index, line in enumerate(lines, 1)):
+        return BlockType.ORDERED_LIST
+    else:
+        return BlockType.PARAGRAPH
+
+def multi_scan_items(block):
+    # Classification followed by the item extraction the renderer used to do
+    block_type = multi_scan_block_to_block_type(block)
+    items = []
+    for line in block.split('\n'):
+        stripped_line = line.strip()
+        if block_type == BlockType.ORDERED_LIST:
+            if stripped_line and any(stripped_line.startswith(f"{i}.") for i in range(10)):
+                items.append(stripped_line[stripped_line.find('.') + 1:].strip())
+        elif block_type == BlockType.UNORDERED_LIST:
+            if stripped_line and stripped_line.startswith(("-", "*", "+")):
+                items.append(stripped_line[1:].strip())
+        elif block_type == BlockType.QUOTE:
+            items.append(line[1:].strip())
+    return block_type, items
+
+def measure(function, argument, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1000
+
+BLOCKS = {
+    "ordered list": "\n".join(f"{i}. changelog entry number {i}" for i in range(1, 10001)),
+    "unordered list": "\n".join(f"- changelog entry number {i}" for i in range(10000)),
+    "quote": "\n".join(f"> quoted line number {i}" for i in range(10000)),
+    "paragraph": "\n".join(f"plain line number {i}" for i in range(10000)),
+}
+
+def main():
+    print(f"{'block (10k lines)':<18} {'classify ms':>12} {'+ items ms':>11} {'scan_block ms':>14} {'render ms':>10}")
+    for name, block in BLOCKS.items():
+        assert multi_scan_block_to_block_type(block) == block_to_block_type(block)
+        classify = measure(multi_scan_block_to_block_type, block)
+        old = measure(multi_scan_items, block)
+        new = measure(scan_block, block)
+        render = measure(markdown_to_html_node, block, 3)
+        print(f"{name:<18} {classify:>12.2f} {old:>11.2f} {new:>14.2f} {render:>10.2f}")
+
+if __name__ == "__main__":
+    main()
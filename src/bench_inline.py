@@ -0,0 +1,51 @@
+from textnode import TextNode, TextType
+from utils import split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+import sys
+import time
+
+# Compares the single-pass inline scanner in text_to_textnodes with the
+# split_nodes_* cascade it replaced. Run with: python3 src/bench_inline.py
+
+def cascade_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    return split_nodes_link(nodes)
+
+SPANS = [
+    "plain words here ",
+    "**bold** ",
+    "_italic_ ",
+    "`code` ",
+    "[link](https://example.com/page) ",
+    "![image](/images/tom.png) ",
+]
+
+def make_paragraph(spans):
+    return "".join(SPANS[i % len(SPANS)] for i in range(spans))
+
+def measure(function, text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main():
+    print(f"{'spans':>8} {'MB':>7} {'cascade MB/s':>13} {'scanner MB/s':>13} {'speedup':>8}")
+    for spans in (100, 1000, 10000, 50000):
+        text = make_paragraph(spans)
+        if cascade_text_to_textnodes(text) != text_to_textnodes(text):
+            sys.exit(f"Outputs differ for {spans} spans")
+        megabytes = len(text.encode()) / 1e6
+        cascade = measure(cascade_text_to_textnodes, text, 3)
+        scanner = measure(text_to_textnodes, text, 3)
+        print(f"{spans:>8} {megabytes:>7.2f} {megabytes / cascade:>13.2f} {megabytes / scanner:>13.2f} {cascade / scanner:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+from manifest import GENERATOR_VERSION, hash_file
+from writer import discard, temp_path
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import json
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Writes compressed copies next to the text files in the output directory,
+# index.html.gz and index.html.zst, for servers that send a precompressed
+# file when the client accepts it instead of compressing on every request.
+# zlib and zstandard release the GIL, so a thread pool compresses files in
+# parallel without the cost of sending them to other processes.
+
+TEXT_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt", ".map")
+# Files smaller than this fit in a single packet either way
+MIN_SIZE = 256
+
+def available_formats():
+    if zstandard is None:
+        return ["gz"]
+    return ["gz", "zst"]
+
+def compress_data(data, fmt):
+    if fmt == "gz":
+        # mtime=0 so the same page always compresses to the same bytes
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if fmt == "zst":
+        return zstandard.ZstdCompressor(level=19).compress(data)
+    raise ValueError(f"Unknown compression format {fmt!r}")
+
+def sibling_path(path, fmt):
+    return f"{path}.{fmt}"
+
+def compress_file(path, formats):
+    # Returns the size of path and of each compressed copy, or None for
+    # formats that didn't make the file smaller (and so aren't written)
+    with open(path, 'rb') as f:
+        data = f.read()
+    sizes = {}
+    for fmt in formats:
+        compressed = compress_data(data, fmt)
+        sibling = sibling_path(path, fmt)
+        if len(compressed) >= len(data):
+            sizes[fmt] = None
+            if os.path.exists(sibling):
+                os.remove(sibling)
+            continue
+        tmp_path = temp_path(sibling)
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, sibling)
+        except BaseException:
+            discard(tmp_path)
+            raise
+        sizes[fmt] = len(compressed)
+    return len(data), sizes
+
+def find_text_files(dest_dir):
+    paths = []
+    for root, _, files in os.walk(dest_dir):
+        for file in sorted(files):
+            if file.endswith(TEXT_EXTENSIONS):
+                paths.append(os.path.normpath(os.path.join(root, file)))
+    return sorted(paths)
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+class Compressor():
+    # Remembers the content hash each file had when it was last compressed,
+    # along with its size and mtime so that unchanged files aren't even read,
+    # and only compresses files that changed or whose copies are missing
+    def __init__(self, cache_path=None, formats=None, jobs=None):
+        self.cache_path = cache_path
+        self.formats = formats or available_formats()
+        self.jobs = jobs or os.cpu_count() or 1
+        # path -> {"stat": [mtime_ns, size], "hash", "size", "sizes": {format: size}}
+        self.files = {}
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == GENERATOR_VERSION and data.get("formats") == self.formats:
+                self.files = data["files"]
+        self.compressed = 0
+        self.unchanged = 0
+
+    def file_hash(self, path, stat):
+        known = self.files.get(path)
+        if known is not None and known["stat"] == [stat.st_mtime_ns, stat.st_size]:
+            return known["hash"]
+        return hash_file(path)
+
+    def up_to_date(self, path, digest):
+        known = self.files.get(path)
+        if known is None or known["hash"] != digest:
+            return False
+        # Copies can be gone, e.g. after a full build cleared the directory
+        return all((size is None) != os.path.exists(sibling_path(path, fmt)) for fmt, size in known["sizes"].items())
+
+    def run(self, dest_dir, changes=None):
+        files = {}
+        pending = []
+        for path in find_text_files(dest_dir):
+            stat = os.stat(path)
+            if stat.st_size < MIN_SIZE:
+                continue
+            digest = self.file_hash(path, stat)
+            files[path] = {"stat": [stat.st_mtime_ns, stat.st_size], "hash": digest}
+            if self.up_to_date(path, digest):
+                files[path]["size"] = self.files[path]["size"]
+                files[path]["sizes"] = self.files[path]["sizes"]
+                self.unchanged += 1
+            else:
+                pending.append(path)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            results = list(executor.map(lambda path: compress_file(path, self.formats), pending))
+        for path, (size, sizes) in zip(pending, results):
+            files[path]["size"] = size
+            files[path]["sizes"] = sizes
+            if changes is not None:
+                for fmt, compressed_size in sizes.items():
+                    if compressed_size is not None:
+                        changes.add_written(sibling_path(path, fmt))
+        self.compressed = len(pending)
+
+        # Copies of files that are gone or too small now
+        for path, known in self.files.items():
+            if path in files:
+                continue
+            for fmt, size in known["sizes"].items():
+                sibling = sibling_path(path, fmt)
+                if size is not None and os.path.exists(sibling):
+                    os.remove(sibling)
+                    if changes is not None:
+                        changes.add_removed(sibling)
+        self.files = files
+
+    def summary(self):
+        total = sum(entry["size"] for entry in self.files.values())
+        parts = []
+        for fmt in self.formats:
+            # Files a format didn't shrink are served as they are
+            size = sum(entry["sizes"][fmt] or entry["size"] for entry in self.files.values())
+            ratio = size / total * 100 if total else 0.0
+            parts.append(f"{fmt} {format_size(size)} ({ratio:.1f}%)")
+        return f"Compressed {self.compressed} files, {self.unchanged} unchanged: {format_size(total)} -> " + ", ".join(parts)
+
+    def save(self):
+        if self.cache_path is None:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": GENERATOR_VERSION, "formats": self.formats, "files": self.files}, f)
+        os.replace(tmp_path, self.cache_path)
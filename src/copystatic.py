@@ -1,14 +1,21 @@
+from manifest import hash_file
+from concurrent.futures import ThreadPoolExecutor
 import os
 import shutil
 
-def copy_static(source, destination):
+def copy_static(source, destination, clean=True, rename=None):
     # First check if destination exists, if so delete it
-    if os.path.exists(destination):
+    if clean and os.path.exists(destination):
         shutil.rmtree(destination)
-    
+
     # Create the destination directory
-    os.mkdir(destination)
-    
+    os.makedirs(destination, exist_ok=True)
+
+    # Files published under other names (see sync_static)
+    if rename is not None:
+        sync_static(source, destination, rename=rename)
+        return
+
     # Now implement the recursive copying logic
     copy_recurse(source, destination)
 
@@ -21,5 +28,96 @@ def copy_recurse(source, destination):
             shutil.copy(os.path.join(source,file), os.path.join(destination,file))
         else:
             print(f"Recusing into {os.path.join(source,file)}")
-            os.mkdir(os.path.join(destination,file))
-            copy_recurse(os.path.join(source,file), os.path.join(destination,file))
\ No newline at end of file
+            os.makedirs(os.path.join(destination,file), exist_ok=True)
+            copy_recurse(os.path.join(source,file), os.path.join(destination,file))
+
+def copy_file(source, destination):
+    # Let the kernel copy the data when it can, which is a reflink on file
+    # systems that support it, and fall back to a regular copy otherwise
+    copied = False
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(source, 'rb') as src, open(destination, 'wb') as dst:
+                size = os.fstat(src.fileno()).st_size
+                offset = 0
+                while offset < size:
+                    count = os.copy_file_range(src.fileno(), dst.fileno(), size - offset, offset, offset)
+                    if count == 0:
+                        break
+                    offset += count
+                copied = offset == size
+        except OSError:
+            copied = False
+    if not copied:
+        shutil.copyfile(source, destination)
+    shutil.copystat(source, destination)
+
+def link_file(source, destination):
+    # Hard links only work within one file system
+    try:
+        os.link(source, destination)
+    except OSError:
+        copy_file(source, destination)
+
+def needs_copy(source, destination, checksum):
+    try:
+        dest_stat = os.stat(destination)
+    except FileNotFoundError:
+        return True
+    source_stat = os.stat(source)
+    if source_stat.st_size != dest_stat.st_size:
+        return True
+    if checksum:
+        return hash_file(source) != hash_file(destination)
+    return source_stat.st_mtime_ns != dest_stat.st_mtime_ns
+
+def sync_static(source, destination, manifest=None, checksum=False, link=False, jobs=8, changes=None, rename=None):
+    # Brings destination up to date with source without deleting anything
+    # else in it, such as generated pages. Files are compared by size and
+    # mtime (or content hash with checksum=True) and only changed ones are
+    # copied. Files synced on a previous run that have since disappeared
+    # from source are removed, which needs the manifest to know about them.
+    # Both are recorded in changes when given. rename maps a file's path
+    # relative to source to the one it is published under.
+    copies = []
+    synced = set()
+    for root, _, files in os.walk(source):
+        dest_root = os.path.join(destination, os.path.relpath(root, source))
+        os.makedirs(dest_root, exist_ok=True)
+        for file in files:
+            source_path = os.path.join(root, file)
+            dest_path = os.path.normpath(os.path.join(dest_root, file))
+            if rename is not None:
+                dest_path = os.path.normpath(os.path.join(destination, rename(os.path.relpath(source_path, source))))
+            synced.add(dest_path)
+            if needs_copy(source_path, dest_path, checksum):
+                copies.append((source_path, dest_path))
+
+    def copy(paths):
+        source_path, dest_path = paths
+        # Never write through an old hard link back into the source file
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+        if link:
+            link_file(source_path, dest_path)
+        else:
+            copy_file(source_path, dest_path)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # list() so that errors from the workers are raised here
+        list(executor.map(copy, copies))
+    if changes is not None:
+        for _, dest_path in copies:
+            changes.add_written(dest_path)
+
+    removed = 0
+    if manifest is not None:
+        for dest_path in manifest.static:
+            if dest_path not in synced and os.path.exists(dest_path):
+                os.remove(dest_path)
+                removed += 1
+                if changes is not None:
+                    changes.add_removed(dest_path)
+        manifest.static = sorted(synced)
+    print(f"Synced {source} to {destination}: {len(copies)} copied, {len(synced) - len(copies)} unchanged, {removed} removed")
+    return copies
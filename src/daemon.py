@@ -0,0 +1,103 @@
+import contextlib
+import io
+import json
+import os
+import socket
+import sys
+import traceback
+
+# A long-running generator process. Starting Python and importing the
+# generator costs more than building a small site, and the daemon also keeps
+# compiled templates and the render cache warm between builds. Requests come
+# in over a unix socket, one at a time since builds share docs/.
+#
+# Protocol: the client sends one JSON line {"argv": [...], "cwd": "..."}.
+# The daemon answers with JSON lines {"out": "..."} carrying the command's
+# output as it is printed, and a final {"exit": status}.
+
+class SocketOutput(io.TextIOBase):
+    # Forwards everything printed by a command to the client. Worker
+    # processes forked during the build inherit it, but their output goes to
+    # the daemon's own stdout so that only one process writes to the socket.
+    def __init__(self, connection):
+        self.connection = connection
+        self.pid = os.getpid()
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if os.getpid() != self.pid:
+            return sys.__stdout__.write(text)
+        if text:
+            self.connection.sendall((json.dumps({"out": text}) + "\n").encode())
+        return len(text)
+
+def handle(connection, run):
+    with connection, connection.makefile('rb') as requests:
+        line = requests.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        output = SocketOutput(connection)
+        previous_cwd = os.getcwd()
+        status = 1
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                try:
+                    os.chdir(request["cwd"])
+                    status = run(request["argv"])
+                except SystemExit as exit:
+                    # argparse errors and --help end in sys.exit
+                    status = exit.code if isinstance(exit.code, int) else 1
+                    if isinstance(exit.code, str):
+                        print(exit.code)
+                except Exception:
+                    print(traceback.format_exc(), end="")
+            connection.sendall((json.dumps({"exit": status}) + "\n").encode())
+        except BrokenPipeError:
+            # The client went away, the build still finished
+            pass
+        finally:
+            os.chdir(previous_cwd)
+
+def serve(socket_path, run):
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    print(f"Build daemon listening on {socket_path}")
+    try:
+        while True:
+            connection, _ = server.accept()
+            handle(connection, run)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.remove(socket_path)
+
+def send(socket_path, argv, out=None):
+    # Runs argv on the daemon, printing its output to out (stdout by
+    # default), and returns its status
+    out = out or sys.stdout
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        client.close()
+        print(f"No build daemon is listening on {socket_path}, start one with `main.py daemon`", file=out)
+        return 2
+    with client, client.makefile('rb') as replies:
+        client.sendall((json.dumps({"argv": argv, "cwd": os.getcwd()}) + "\n").encode())
+        for line in replies:
+            reply = json.loads(line)
+            if "out" in reply:
+                out.write(reply["out"])
+                out.flush()
+            else:
+                return reply["exit"]
+    print("The build daemon closed the connection", file=out)
+    return 1
@@ -1,12 +1,25 @@
 import re
 
+# Patterns for inline Markdown, compiled once and shared by everything that
+# scans text for spans
+DELIMITER_PATTERN = re.compile(r"\*\*|[_`]")
+# Images and links in one pass. An image is matched from its "!", so the
+# link syntax inside it is never reported as a link of its own.
+IMAGE_OR_LINK_PATTERN = re.compile(r"(!?)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+def scan_images_and_links(text, pos=0):
+    # Yields (start, end, is_image, text, url) for every image and link from
+    # pos on, in the order they appear. start and end are positions in text,
+    # so callers can slice around a match instead of searching for it again.
+    # Both extraction and rendering (text_to_textnodes) find spans this way.
+    for match in IMAGE_OR_LINK_PATTERN.finditer(text, pos):
+        yield match.start(), match.end(), match.group(1) == "!", match.group(2), match.group(3)
+
 def extract_markdown_images(text):
-    matches = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
-    return matches
+    return [(alt, url) for _, _, is_image, alt, url in scan_images_and_links(text) if is_image]
 
 def extract_markdown_links(text):
-    matches = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
-    return matches
+    return [(anchor, url) for _, _, is_image, anchor, url in scan_images_and_links(text) if not is_image]
 
 def extract_title(markdown):
     lines = markdown.split("\n")
@@ -14,3 +27,16 @@ def extract_title(markdown):
         if line.startswith("# "):
             return line[1:].strip()
     raise Exception("No H1")
+
+class TitleCapture():
+    # Passes lines through unchanged while picking out the title the same way
+    # extract_title does, so it can be found during the parsing pass
+    def __init__(self, lines):
+        self.lines = lines
+        self.title = None
+
+    def __iter__(self):
+        for line in self.lines:
+            if self.title is None and line.startswith("# "):
+                self.title = line[1:].strip()
+            yield line
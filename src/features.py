@@ -0,0 +1,40 @@
+import contextlib
+import sys
+
+# Build-wide features that the pipeline checks on every page: profiling
+# (profiler.py), minified output (minify.py), fingerprinted static files
+# (assets.py) and the render cache (rendercache.py). main and the worker
+# processes only import a feature's module when a build turns it on, so the
+# pipeline asks here instead of importing them itself. A module that was
+# never loaded is switched off.
+
+NO_STAGE = contextlib.nullcontext()
+
+def active_profiler():
+    profiler = sys.modules.get("profiler")
+    return profiler.active if profiler is not None else None
+
+def minifying():
+    minify = sys.modules.get("minify")
+    return minify is not None and minify.enabled
+
+def asset_map():
+    assets = sys.modules.get("assets")
+    return assets.active if assets is not None else None
+
+def render_cache():
+    rendercache = sys.modules.get("rendercache")
+    return rendercache.active if rendercache is not None else None
+
+def stage(name):
+    # Same as profiler.stage(), a no-op unless profiling
+    profiler = active_profiler()
+    if profiler is None:
+        return NO_STAGE
+    return profiler.stage(name)
+
+def timed(iterable, name):
+    profiler = active_profiler()
+    if profiler is None:
+        return iterable
+    return profiler.timed(iterable, name)
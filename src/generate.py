@@ -1,28 +1,281 @@
-from extract import extract_title
-from utils import markdown_to_html_node
+from extract import TitleCapture
+from utils import iter_markdown_html, scan_blocks
+from template import load_template
+from manifest import GENERATOR_VERSION, FileHashes
+from writer import BufferWriter, StreamWriter
+import features
+import itertools
 import os
+import time
+import traceback
 
-def generate_page(from_path, template_path, dest_path, basepath):
+default_writer = StreamWriter()
+
+# What generate_page can collect into page besides its dependencies, links
+# and title: "terms" for the search index and "metadata" for the sitemap
+COLLECT_TERMS = "terms"
+COLLECT_METADATA = "metadata"
+
+def generate_page(from_path, template_path, dest_path, basepath, page=None, writer=None, collect=()):
+    # page, when given, is a dict that collects what is learned about the
+    # page while rendering it, like the files it was built from, plus what
+    # collect asks for. writer decides how the page gets to disk (see
+    # writer.py).
+    if writer is None:
+        writer = default_writer
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    from_file = open(from_path, 'r').read()
-    template_file = open(template_path, 'r').read()
-    from_node = markdown_to_html_node(from_file)
-    from_string = from_node.to_html()
-    title = extract_title(from_file)
-    hydrated_template = template_file.replace("{{ Title }}", title).replace("{{ Content }}", from_string).replace("href=\"/", f"href=\"{basepath}").replace("src=\"/", f"src=\"{basepath}")
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, 'w') as f:
-        print(f"{hydrated_template}", file=f)
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    print(f"Generating page from {dir_path_content} to {dest_dir_path} using {template_path}")
-    items = os.listdir(dir_path_content)
+    profiler = features.active_profiler()
+    if profiler is not None:
+        profiler.start_page(dest_path)
+        start = time.perf_counter()
+    with features.stage("template"):
+        template = load_template(template_path, basepath)
+    links = None
+    terms = None
+    if page is not None:
+        page["deps"] = [from_path] + template.dependencies
+        links = page["links"] = []
+        if COLLECT_TERMS in collect:
+            terms = page["terms"] = {}
+
+    # The source is read line by line and each block is rendered and written
+    # as soon as it has been scanned, so neither the Markdown nor the page is
+    # ever held in memory as a whole
+    with open(from_path, 'r') as source:
+        lines = TitleCapture(source)
+        blocks = features.timed(scan_blocks(lines), "markdown_to_blocks")
+        if page is not None and COLLECT_METADATA in collect:
+            from sitemap import capture_summary
+            page["updated"] = os.stat(from_path).st_mtime
+            page["summary"] = None
+            blocks = capture_summary(blocks, page)
+
+        # The template needs the title before the content, so read ahead
+        # until it has been seen. It is nearly always in the first block.
+        read_ahead = []
+        for block in blocks:
+            read_ahead.append(block)
+            if lines.title is not None:
+                break
+        if lines.title is None:
+            raise Exception("No H1")
+
+        if page is not None:
+            page["title"] = lines.title
+        content = iter_markdown_html(itertools.chain(read_ahead, blocks), basepath, links, terms)
+        values = {"Title": lines.title, "Content": content, "Basepath": basepath}
+        chunks = features.timed(template.iter_render(values), "to_html")
+        if not features.minifying():
+            chunks = itertools.chain(chunks, ("\n",))
+        output_hash = writer.write(dest_path, chunks)
+    asset_map = features.asset_map()
+    if page is not None and asset_map is not None:
+        # A page changes when a static file it links to is renamed
+        for url in links:
+            asset = asset_map.lookup(url)
+            if asset is not None and asset["source"] not in page["deps"]:
+                page["deps"].append(asset["source"])
+    if profiler is not None:
+        profiler.add("total", time.perf_counter() - start)
+    return output_hash
+
+def page_dest_path(from_path, dir_path_content, dest_dir_path):
+    # Where find_pages puts the output for a single source file
+    directory, item = os.path.split(os.path.relpath(from_path, dir_path_content))
+    return os.path.join(dest_dir_path, directory, item.replace("md", "html"))
+
+def find_pages(dir_path_content, dest_dir_path):
+    # Returns (source, destination) pairs for every page under dir_path_content
+    pages = []
+    items = sorted(os.listdir(dir_path_content))
     for item in items:
         from_item_path = os.path.join(dir_path_content, item)
         dest_item_path = os.path.join(dest_dir_path, item)
         if os.path.isfile(from_item_path):
             item = item.replace("md", "html")
             dest_item_path = os.path.join(dest_dir_path, item)
-            generate_page(from_item_path, template_path, dest_item_path, basepath)
+            pages.append((from_item_path, dest_item_path))
+        else:
+            pages.extend(find_pages(from_item_path, dest_item_path))
+    return pages
+
+# Set in worker processes whose pages are written by the parent
+worker_writer = None
+# What worker processes collect about each page
+worker_collect = ()
+
+def init_worker(profiling, cache_settings, buffered, collect, asset_map, minifying):
+    # Like main, a worker only imports the feature modules the build uses.
+    # Forked workers start out with the parent's modules, and their state.
+    global worker_writer, worker_collect
+    worker_collect = collect
+    if profiling:
+        import profiler
+        profiler.enable()
+    if minifying:
+        import minify
+        minify.enable()
+    if asset_map is not None:
+        import assets
+        assets.enable(asset_map)
+    if buffered:
+        worker_writer = BufferWriter()
+    if cache_settings is not None:
+        import rendercache
+        max_bytes, path = cache_settings
+        # New fragments always go back to the parent, whose cache is the one
+        # that is reported on, saved and kept for the next build
+        rendercache.enable(True, max_bytes, path, track_added=True)
+
+def render_job(job):
+    # Runs in a worker process, so failures are returned rather than raised
+    # and per-process state (profiling timings, render cache counters and new
+    # fragments) is sent back to the parent along with the result
+    from_path, template_path, dest_path, basepath = job
+    result = {"dest": dest_path, "output": None, "error": None}
+    try:
+        result["output"] = generate_page(from_path, template_path, dest_path, basepath, result, worker_writer, worker_collect)
+    except Exception:
+        result["error"] = traceback.format_exc()
+    if worker_writer is not None:
+        result["data"] = worker_writer.take(dest_path)
+    profiler = features.active_profiler()
+    if profiler is not None:
+        result["timings"] = profiler.take_page(dest_path)
+    cache = features.render_cache()
+    if cache is not None:
+        result["cache"] = cache.take_updates()
+    return result
+
+def run_jobs(jobs_list, jobs, writer=None, collect=()):
+    # Yields a result dict per page, in the same order as jobs_list. With a
+    # writer, workers only render and the parent's writer does the I/O.
+    if jobs <= 1 or len(jobs_list) <= 1:
+        for job in jobs_list:
+            from_path, template_path, dest_path, basepath = job
+            result = {"dest": dest_path, "output": None, "error": None}
+            try:
+                result["output"] = generate_page(from_path, template_path, dest_path, basepath, result, writer, collect)
+            except Exception:
+                result["error"] = traceback.format_exc()
+            yield result
+        return
+    # Only builds that use more than one process pay for importing this
+    from concurrent.futures import ProcessPoolExecutor
+    # Hand each worker a few chunks so that slow pages don't leave cores idle
+    chunksize = max(1, len(jobs_list) // (jobs * 4))
+    profiler = features.active_profiler()
+    cache = features.render_cache()
+    cache_settings = (cache.max_bytes, cache.path) if cache is not None else None
+    initargs = (profiler is not None, cache_settings, writer is not None, collect, features.asset_map(), features.minifying())
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=initargs) as executor:
+        for result in executor.map(render_job, jobs_list, chunksize=chunksize):
+            if "timings" in result:
+                profiler.pages[result["dest"]] = result["timings"]
+            if "cache" in result:
+                cache.merge(result.pop("cache"))
+            data = result.pop("data", None)
+            if data is not None:
+                writer.submit(result["dest"], data, result["output"])
+            yield result
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, manifest=None, jobs=1, writer=None, force=False, link_index=None, shard=None, search_index=None, site_map=None):
+    print(f"Generating page from {dir_path_content} to {dest_dir_path} using {template_path}")
+    all_pages = find_pages(dir_path_content, dest_dir_path)
+    # With shard=(index, count) only this run's share of the pages is built
+    pages = all_pages
+    if shard is not None:
+        from shard import select_shard
+        pages = select_shard(all_pages, shard, dir_path_content)
+
+    # Incremental build: only re-render pages for which one of the files
+    # they were built from changed, going by the dependencies recorded in
+    # the manifest the last time each page was rendered. force re-renders
+    # every page but still uses the manifest to leave unchanged output alone.
+    todo = []
+    params = {"template": template_path, "basepath": basepath, "version": GENERATOR_VERSION}
+    if features.minifying():
+        params["minify"] = True
+    asset_map = features.asset_map()
+    if asset_map is not None:
+        # Links to static files point at other names
+        params["assets"] = True
+    # Static files were already hashed by the asset map
+    hash_of = FileHashes(asset_map.hashes() if asset_map is not None else None)
+    for from_path, dest_path in pages:
+        if manifest is None or force or not manifest.is_fresh(dest_path, params, hash_of):
+            todo.append((from_path, template_path, dest_path, basepath))
+        elif search_index is not None and dest_path not in search_index.pages:
+            # Fresh, but its terms were never collected
+            todo.append((from_path, template_path, dest_path, basepath))
+        elif site_map is not None and dest_path not in site_map.pages:
+            todo.append((from_path, template_path, dest_path, basepath))
+    collect = []
+    if search_index is not None:
+        collect.append(COLLECT_TERMS)
+    if site_map is not None:
+        collect.append(COLLECT_METADATA)
+    collect = tuple(collect)
+
+    errors = []
+    rendered = []
+    for result in run_jobs(todo, jobs, writer, collect):
+        if result["error"] is not None:
+            errors.append((result["dest"], result["error"]))
         else:
-            generate_pages_recursive(from_item_path, template_path, dest_item_path, basepath)
\ No newline at end of file
+            rendered.append(result)
+    # Pages only count as built once they are actually on disk
+    if writer is not None:
+        writer.flush()
+    if manifest is not None:
+        for result in rendered:
+            deps = {path: hash_of(path) for path in result["deps"]}
+            manifest.record(result["dest"], params, deps, result["output"], result["links"])
+    if errors:
+        for dest_path, error in errors:
+            print(f"Failed to generate {dest_path}:\n{error}")
+        raise Exception(f"{len(errors)} of {len(todo)} pages failed to generate")
+
+    if search_index is not None or site_map is not None:
+        from search import page_url
+    if search_index is not None:
+        for result in rendered:
+            url = page_url(result["dest"], dest_dir_path, basepath)
+            search_index.add_page(result["dest"], url, result["title"], result["terms"])
+        search_index.retain(set(dest_path for _, dest_path in all_pages))
+    if site_map is not None:
+        for result in rendered:
+            url = page_url(result["dest"], dest_dir_path, basepath)
+            site_map.add_page(result["dest"], url, result["title"], result["updated"], result["summary"])
+        site_map.retain(set(dest_path for _, dest_path in all_pages))
+
+    # Pages that weren't rendered this time are checked with the links the
+    # manifest kept from when they were
+    if link_index is not None:
+        rendered_links = {result["dest"]: result["links"] for result in rendered}
+        for from_path, dest_path in all_pages:
+            if dest_path in rendered_links:
+                link_index.add_page(dest_path, from_path, rendered_links[dest_path])
+            elif manifest is not None and dest_path in manifest.pages:
+                link_index.add_page(dest_path, from_path, manifest.pages[dest_path]["links"])
+            else:
+                # Built by another shard, only a target here
+                link_index.add_page(dest_path, from_path, [])
+    if manifest is None:
+        return
+
+    # Remove outputs whose source page no longer exists. Pages that now
+    # belong to another shard are only dropped from this shard's manifest.
+    current = set(dest_path for _, dest_path in all_pages)
+    mine = set(dest_path for _, dest_path in pages)
+    removed = 0
+    for dest_path in list(manifest.pages):
+        if dest_path in current and dest_path not in mine:
+            manifest.forget(dest_path)
+        elif dest_path not in current:
+            if os.path.exists(dest_path):
+                print(f"Removing stale page {dest_path}")
+                (writer or default_writer).remove(dest_path)
+            manifest.forget(dest_path)
+            removed += 1
+    print(f"Rebuilt {len(todo)} of {len(pages)} pages, removed {removed}")
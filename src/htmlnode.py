@@ -1,30 +1,51 @@
+import sys
+from types import MappingProxyType
+
+# Shared by every node without attributes instead of a fresh {} per node
+EMPTY_PROPS = MappingProxyType({})
+
 class HTMLNode():
+    # Pages can have millions of nodes, so no per-instance __dict__
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        # Tag names repeat across the whole tree, keep a single copy of each
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
         self.children = children
         self.props = props
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def write_html(self, fp):
+        # Streams the node to a file-like object without building the whole string
+        for chunk in self.iter_html():
+            fp.write(chunk)
+
+    def iter_html(self):
+        # Yields the HTML for this node as a sequence of fragments
         if self.tag is None:
-            return self.value or ""
-        
+            yield self.value or ""
+            return
+
         # Handle self-closing tags like <img> or <br>
         if self.children is None and self.value is None:
-            return f"<{self.tag}{self.props_to_html()}>"
-        
+            yield f"<{self.tag}{self.props_to_html()}>"
+            return
+
         # Handle regular tags with content
-        children_html = ""
+        yield f"<{self.tag}{self.props_to_html()}>"
+        if self.value:
+            yield self.value
         if self.children:
             for child in self.children:
-                children_html += child.to_html()
-        
-        value = self.value or ""
-        return f"<{self.tag}{self.props_to_html()}>{value}{children_html}</{self.tag}>"
-    
+                yield from child.iter_html()
+        yield f"</{self.tag}>"
+
     def props_to_html(self):
         html = ""
-        if (self.props==None):
+        if not self.props:
             return html
         for prop in self.props:
             html += f" {prop}=\"{self.props[prop]}\""
@@ -32,4 +53,3 @@ class HTMLNode():
 
     def __repr__(self):
         return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
-
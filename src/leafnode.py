@@ -1,16 +1,15 @@
 from htmlnode import HTMLNode
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self,  tag=None, value=None,  props=None):
         super().__init__(tag=tag, value=value, props=props)
 
-    def to_html(self):
+    def iter_html(self):
         if self.value is None:
             raise ValueError
         if self.tag == None:
-            return self.value
-        props = ""
-        if self.props is not None and len(self.props) > 0:
-            for prop in self.props:
-                props += f" {prop}=\"{self.props[prop]}\""
-        return f"<{self.tag}{props}>{self.value}</{self.tag}>"
\ No newline at end of file
+            yield self.value
+            return
+        yield f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
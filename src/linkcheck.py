@@ -0,0 +1,88 @@
+import os
+import posixpath
+
+# Every page records the link and image targets it rendered, as written in
+# the Markdown. After the build they are resolved against the generated pages
+# and the static files to find the ones that lead nowhere.
+
+def is_external(url):
+    # Other sites, mail links and links within the same page are not checked
+    if url.startswith(("//", "#")) or url == "":
+        return True
+    scheme, colon, _ = url.partition(":")
+    return colon != "" and "/" not in scheme
+
+def resolve(url, page_path, dest_dir):
+    # The output path a local link points to, or None for external links
+    if is_external(url):
+        return None
+    url = url.split("#", 1)[0].split("?", 1)[0]
+    if url.startswith("/"):
+        path = posixpath.join(dest_dir, url.lstrip("/"))
+    else:
+        path = posixpath.join(os.path.dirname(page_path), url)
+    return os.path.normpath(path)
+
+class LinkIndex():
+    def __init__(self, dest_dir):
+        self.dest_dir = dest_dir
+        # output path -> (source path, link targets)
+        self.pages = {}
+        self.files = set()
+
+    def add_page(self, dest_path, source_path, links):
+        self.pages[os.path.normpath(dest_path)] = (source_path, links)
+
+    def add_static(self, static_dir):
+        # Static files as they end up in the output directory
+        for root, _, files in os.walk(static_dir):
+            dest_root = os.path.join(self.dest_dir, os.path.relpath(root, static_dir))
+            for file in files:
+                self.files.add(os.path.normpath(os.path.join(dest_root, file)))
+
+    def exists(self, path):
+        # A link to a directory is served by its index.html
+        if path in self.pages or path in self.files:
+            return True
+        return os.path.join(path, "index.html") in self.pages
+
+    def broken(self):
+        # Returns (source path, line, url) for every link that leads nowhere
+        results = []
+        checked = {}
+        for dest_path, (source_path, links) in sorted(self.pages.items()):
+            missing = []
+            for url in links:
+                path = resolve(url, dest_path, self.dest_dir)
+                if path is None:
+                    continue
+                if path not in checked:
+                    checked[path] = self.exists(path)
+                if not checked[path] and url not in missing:
+                    missing.append(url)
+            if missing:
+                results.extend(find_lines(source_path, missing))
+        return results
+
+def find_lines(source_path, urls):
+    # Line numbers are only looked up for the few broken links, by searching
+    # the source for each target instead of keeping positions for every link
+    found = {url: [] for url in urls}
+    try:
+        with open(source_path) as f:
+            for number, line in enumerate(f, 1):
+                for url in urls:
+                    if f"]({url})" in line:
+                        found[url].append(number)
+    except FileNotFoundError:
+        pass
+    results = []
+    for url in urls:
+        for number in found[url] or [0]:
+            results.append((source_path, number, url))
+    return sorted(results, key=lambda result: result[1])
+
+def report(broken):
+    for source_path, line, url in broken:
+        print(f"{source_path}:{line}: broken link to {url}")
+    print(f"Found {len(broken)} broken links")
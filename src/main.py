@@ -1,14 +1,292 @@
-from textnode import TextNode, TextType
-from copystatic import copy_static
-from generate import generate_page, generate_pages_recursive
 import sys
 
-def main():
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
-    copy_static("static", "docs")
-    generate_pages_recursive("content/", "template.html", "docs/", basepath)
+# Only what every command needs is imported up front. Each command imports
+# the modules it uses when it runs, so quick commands like serve or send
+# don't pay for loading the whole generator.
+
+MANIFEST_PATH = ".cache/manifest.json"
+DAEMON_SOCKET = ".cache/daemon.sock"
+SEARCH_CACHE_PATH = ".cache/search.json"
+ASSETS_CACHE_PATH = ".cache/assets.json"
+SITEMAP_CACHE_PATH = ".cache/sitemap.json"
+COMPRESS_CACHE_PATH = ".cache/compress.json"
+
+USAGE = """usage: main.py [command] [options]
+
+commands:
+  build [basepath]   build the site from content/ into docs/ (the default)
+  check [basepath]   incremental build that fails on broken links
+  watch              rebuild on changes and serve docs/ with live reload
+  serve              serve docs/ as it is
+  merge N            combine the manifests of an N-way sharded build
+  daemon             keep a warm generator running that builds on request
+  send COMMAND ...   run a command on the daemon instead of a new process
+
+run main.py COMMAND --help for the options of a command"""
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    sys.exit(run(argv))
+
+def run(argv):
+    # Runs a command and returns its exit status
+    command = argv[0] if argv else "build"
+    if command in ("-h", "--help"):
+        print(USAGE)
+        return 0
+    if command not in COMMANDS:
+        # Plain `main.py [basepath] [options]` is a build
+        return build(argv)
+    return COMMANDS[command](argv[1:])
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(prog="main.py build", description="Build the site from content/ into docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--incremental", action="store_true", help="only re-render pages whose inputs changed")
+    parser.add_argument("--checksum", action="store_true", help="compare static files by content hash instead of size and mtime")
+    parser.add_argument("--link", action="store_true", help="hard link static files into docs/ instead of copying them")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="render pages on N worker processes (0 means one per CPU)")
+    parser.add_argument("--profile", nargs="?", const=".cache/profile.json", metavar="REPORT", help="time each build stage per page and write a JSON report")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="number of slowest pages to list when profiling")
+    parser.add_argument("--render-cache", action="store_true", help="reuse the HTML of blocks repeated across pages")
+    parser.add_argument("--render-cache-file", metavar="PATH", help="keep the render cache in PATH between builds (implies --render-cache)")
+    parser.add_argument("--render-cache-size", type=int, default=64, metavar="MB", help="maximum size of the render cache")
+    parser.add_argument("--write-thread", action="store_true", help="write pages on a background thread while rendering carries on")
+    parser.add_argument("--skip-unchanged", action="store_true", help="keep docs/ and leave files whose content did not change untouched, so their mtimes are preserved")
+    parser.add_argument("--changed-files", metavar="PATH", help="write the files this build wrote or removed to PATH as JSON (needs --incremental or --skip-unchanged)")
+    parser.add_argument("--check-links", action="store_true", help="fail the build when a link or image points at a page or file that doesn't exist")
+    parser.add_argument("--shard", metavar="I/N", help="only build the I-th of N equal slices of the pages, into docs/ and a manifest of its own")
+    parser.add_argument("--search-index", action="store_true", help="write a full-text search index to docs/search/")
+    parser.add_argument("--sitemap", metavar="SITE_URL", help="write sitemap.xml and an Atom feed per section for the site served at SITE_URL")
+    parser.add_argument("--assets", action="store_true", help="publish static files under content-hashed names and give images their width and height")
+    parser.add_argument("--minify", action="store_true", help="leave insignificant whitespace out of the generated pages")
+    parser.add_argument("--compress", action="store_true", help="write .gz (and .zst when zstandard is installed) copies of pages and text assets next to them")
+    return parser
+
+def disable(name, *args):
+    # Turns off a build-wide feature that an earlier build in the same
+    # process (a daemon) turned on. A module that was never imported is
+    # still off, and is left unimported.
+    module = sys.modules.get(name)
+    if module is not None:
+        module.enable(*args)
+
+def build(argv):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # Feature modules are only imported by the builds that use them
+    from copystatic import copy_static, sync_static
+    from generate import generate_pages_recursive
+    from manifest import Manifest
+    from writer import ChangeList, StreamWriter, ThreadedWriter
+    import os
+
+    shard = None
+    if args.shard:
+        from shard import parse_shard, shard_manifest_path
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as error:
+            parser.error(str(error))
+    if args.changed_files and not (args.incremental or args.skip_unchanged or args.shard):
+        # A full build replaces every file in docs/
+        parser.error("--changed-files needs --incremental, --skip-unchanged or --shard")
+    if args.search_index and args.shard:
+        # Every shard would only index its own pages
+        parser.error("--search-index can't be used with --shard")
+    if args.sitemap and args.shard:
+        parser.error("--sitemap can't be used with --shard")
+    jobs = args.jobs or os.cpu_count() or 1
+    # A daemon runs many builds in one process, so nothing is left over from
+    # the last one, except the entries of a render cache with the same
+    # settings
+    if args.profile:
+        import profiler
+        profiler.enable()
+    else:
+        disable("profiler", False)
+    if args.minify:
+        import minify
+        minify.enable()
+    else:
+        disable("minify", False)
+    if args.render_cache or args.render_cache_file:
+        import rendercache
+        settings = (args.render_cache_size * 1024 * 1024, args.render_cache_file)
+        cache = rendercache.active
+        if cache is None or (cache.max_bytes, cache.path) != settings:
+            rendercache.enable(True, *settings)
+        else:
+            cache.reset_counts()
+    else:
+        disable("rendercache", False)
+    changes = ChangeList() if args.changed_files else None
+    link_index = None
+    if args.check_links:
+        from linkcheck import LinkIndex
+        link_index = LinkIndex("docs")
+    search_index = None
+    if args.search_index:
+        from search import SearchIndex
+        search_index = SearchIndex(SEARCH_CACHE_PATH)
+    site_map = None
+    if args.sitemap:
+        from sitemap import SiteMap
+        site_map = SiteMap(SITEMAP_CACHE_PATH)
+    asset_map = None
+    rename = None
+    if args.assets:
+        from assets import AssetMap
+        import assets
+        asset_map = assets.enable(AssetMap("static", ASSETS_CACHE_PATH))
+        rename = asset_map.dest_path
+    else:
+        disable("assets", None)
+
+    if args.incremental or args.skip_unchanged or shard is not None:
+        # Keep the existing output around so unchanged pages can be reused,
+        # or at least left alone when they render to the same bytes. Shards
+        # share docs/, so they must never clear it either.
+        if shard is None:
+            manifest = Manifest(MANIFEST_PATH)
+        else:
+            manifest = Manifest(shard_manifest_path(MANIFEST_PATH, *shard))
+            manifest.shard = list(shard)
+        writer_class = ThreadedWriter if args.write_thread else StreamWriter
+        writer = writer_class(known_hashes=manifest.output_hashes(), changes=changes)
+        # Static files are copied once, by the first shard
+        if shard is None or shard[0] == 1:
+            sync_static("static", "docs", manifest, args.checksum, args.link, changes=changes, rename=rename)
+        try:
+            generate_pages_recursive("content/", "template.html", "docs/", args.basepath, manifest, jobs, writer, force=not args.incremental, link_index=link_index, shard=shard, search_index=search_index, site_map=site_map)
+        finally:
+            manifest.save()
+        writer.close()
+    else:
+        writer = ThreadedWriter() if args.write_thread else None
+        copy_static("static", "docs", rename=rename)
+        generate_pages_recursive("content/", "template.html", "docs/", args.basepath, jobs=jobs, writer=writer, link_index=link_index, search_index=search_index, site_map=site_map)
+        if writer is not None:
+            writer.close()
+    if asset_map is not None:
+        asset_map.save()
+    if search_index is not None:
+        search_index.write("docs", StreamWriter(known_hashes=search_index.shard_hashes, changes=changes))
+        search_index.save()
+    if site_map is not None:
+        site_map.write("docs", args.sitemap, args.basepath, StreamWriter(known_hashes=site_map.output_hashes, changes=changes))
+        site_map.save()
+    if args.compress:
+        from compress import Compressor
+        # After everything else, so that it sees the final output
+        compressor = Compressor(COMPRESS_CACHE_PATH)
+        compressor.run("docs", changes)
+        compressor.save()
+        print(compressor.summary())
+    if changes is not None:
+        changes.save(args.changed_files, "docs")
+        print(f"Wrote list of {len(changes.written)} written and {len(changes.removed)} removed files to {args.changed_files}")
+
+    if args.render_cache or args.render_cache_file:
+        rendercache.active.save()
+        print(rendercache.active.summary())
+    if args.profile:
+        profiler.active.write_report(args.profile)
+        profiler.active.print_summary(args.profile_top)
+        print(f"Wrote profile report to {args.profile}")
+    if link_index is not None:
+        from linkcheck import report
+        link_index.add_static("static")
+        broken = link_index.broken()
+        report(broken)
+        if broken:
+            return 1
+    return 0
+
+def merge(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="main.py merge", description="Combine the manifests of a sharded build and check that every page was built")
+    parser.add_argument("count", type=int, metavar="N", help="number of shards the build was split into")
+    args = parser.parse_args(argv)
+    from generate import find_pages
+    from shard import merge_manifests
+
+    pages = find_pages("content/", "docs/")
+    manifest, problems = merge_manifests(MANIFEST_PATH, args.count, pages)
+    for problem in problems:
+        print(problem)
+    if problems:
+        print(f"Sharded build is incomplete, {len(problems)} problems")
+        return 1
+    manifest.save()
+    print(f"Merged {args.count} shard manifests covering {len(pages)} pages into {MANIFEST_PATH}")
+    return 0
+
+def check(argv):
+    # An incremental build is close to free when nothing changed, and keeps
+    # the links of every page in the manifest up to date
+    return build(["--incremental", "--check-links"] + argv)
+
+def watch(argv):
+    import watch
+    watch.main(argv)
+    return 0
+
+def serve(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Serve docs/ without building it")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--directory", default="docs")
+    args = parser.parse_args(argv)
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+    import functools
+
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=args.directory)
+    server = ThreadingHTTPServer(("", args.port), handler)
+    print(f"Serving {args.directory} on http://localhost:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+    return 0
+
+def daemon(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="main.py daemon", description="Keep the generator running and build whenever `main.py send` asks")
+    parser.add_argument("--socket", default=DAEMON_SOCKET, help="path of the unix socket to listen on")
+    args = parser.parse_args(argv)
+    import daemon
+
+    daemon.serve(args.socket, run_in_daemon)
+    return 0
+
+def run_in_daemon(argv):
+    # Commands that run forever would block the daemon
+    command = argv[0] if argv else "build"
+    if command in ("watch", "serve", "daemon", "send"):
+        print(f"{command} can't run on the daemon")
+        return 2
+    return run(argv)
+
+def send(argv):
+    socket_path = DAEMON_SOCKET
+    if argv[:1] == ["--socket"]:
+        socket_path, argv = argv[1], argv[2:]
+    import daemon
+
+    return daemon.send(socket_path, argv)
+
+COMMANDS = {
+    "build": build,
+    "check": check,
+    "watch": watch,
+    "serve": serve,
+    "merge": merge,
+    "daemon": daemon,
+    "send": send,
+}
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+
+# Bump this whenever a change to the generator changes the HTML it produces,
+# so that every page is re-rendered on the next incremental build.
+GENERATOR_VERSION = "8"
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+class FileHashes():
+    # Hashes each file at most once per build. Missing files hash to None.
+    # known holds hashes that are already known, e.g. from the asset map.
+    def __init__(self, known=None):
+        self.hashes = dict(known or {})
+
+    def __call__(self, path):
+        if path not in self.hashes:
+            try:
+                self.hashes[path] = hash_file(path)
+            except FileNotFoundError:
+                self.hashes[path] = None
+        return self.hashes[path]
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Manifest():
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        self.static = []
+        # [index, count] for the manifest of one shard of a build
+        self.shard = None
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            # A manifest written by another generator version can't be trusted
+            if data.get("version") == GENERATOR_VERSION:
+                self.pages = data.get("pages", {})
+                self.static = data.get("static", [])
+                self.shard = data.get("shard")
+
+    def is_fresh(self, dest_path, params, hash_of):
+        # A page is fresh when it was built with the same parameters and
+        # every file it read last time still has the same hash
+        entry = self.pages.get(dest_path)
+        if entry is None or entry["params"] != params:
+            return False
+        for path, digest in entry["deps"].items():
+            if hash_of(path) != digest:
+                return False
+        return os.path.exists(dest_path)
+
+    def record(self, dest_path, params, deps, output_hash, links=()):
+        self.pages[dest_path] = {"params": params, "deps": deps, "output": output_hash, "links": list(links)}
+
+    def output_hashes(self):
+        # Hash of each output as it was written by the last build
+        return {dest_path: entry["output"] for dest_path, entry in self.pages.items()}
+
+    def forget(self, dest_path):
+        self.pages.pop(dest_path, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            data = {"version": GENERATOR_VERSION, "pages": self.pages, "static": self.static}
+            if self.shard is not None:
+                data["shard"] = self.shard
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
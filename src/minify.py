@@ -0,0 +1,100 @@
+import re
+
+# Minified output drops the whitespace that never shows on the page: runs of
+# spaces and newlines shrink to a single space, and whitespace next to block
+# level tags goes away entirely. Markdown is minified while its node tree is
+# serialized and templates when they are compiled, so the finished page is
+# never parsed again. Whitespace inside <pre>, <code>, <textarea>, <script>
+# and <style> is kept as written.
+
+# Set while a build minifies its pages, in worker processes as well
+enabled = False
+
+BLOCK_TAGS = frozenset((
+    "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript",
+    "article", "aside", "section", "nav", "header", "footer", "main", "div", "p",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd",
+    "blockquote", "pre", "hr", "br", "figure", "figcaption", "form", "fieldset",
+    "table", "caption", "thead", "tbody", "tfoot", "tr", "th", "td",
+))
+PRESERVE_TAGS = frozenset(("pre", "code", "textarea", "script", "style"))
+
+# Only what HTML counts as whitespace, not e.g. non-breaking spaces
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\r\f]+")
+# Tags, comments and doctypes in template markup
+MARKUP_PATTERN = re.compile(r"<!--.*?-->|<![^>]*>|<(/?)([a-zA-Z][\w-]*)(?:\"[^\"]*\"|'[^']*'|[^'\">])*>", re.S)
+
+def collapse(text):
+    return WHITESPACE_PATTERN.sub(" ", text)
+
+def iter_html(node, preserve=False):
+    # Minifying counterpart of node.iter_html(). Whitespace-only text between
+    # block level children is dropped.
+    tag = node.tag
+    if tag is None:
+        value = node.value or ""
+        yield value if preserve else collapse(value)
+        return
+    props = node.props_to_html()
+    if node.children is None and node.value is None:
+        yield f"<{tag}{props}>"
+        return
+    preserve = preserve or tag in PRESERVE_TAGS
+    yield f"<{tag}{props}>"
+    if node.value:
+        yield node.value if preserve else collapse(node.value)
+    if node.children:
+        children = node.children
+        for index, child in enumerate(children):
+            if not preserve and child.tag is None and not (child.value or "").strip(" \t\n\r\f"):
+                before = children[index - 1].tag if index > 0 else tag
+                after = children[index + 1].tag if index + 1 < len(children) else tag
+                if before in BLOCK_TAGS or after in BLOCK_TAGS:
+                    continue
+            yield from iter_html(child, preserve)
+    yield f"</{tag}>"
+
+def is_block(match):
+    # Comments and doctypes are treated like block tags
+    return match is not None and (match.group(2) is None or match.group(2).lower() in BLOCK_TAGS)
+
+class MarkupMinifier():
+    # Minifies a template's literal text piece by piece, as it is split up
+    # around placeholders. What comes before or after a placeholder is
+    # unknown, so whitespace there is only collapsed. The tag whose content
+    # is being kept as written carries over from one piece to the next.
+    def __init__(self):
+        self.preserving = None
+
+    def minify(self, text):
+        parts = []
+        previous = None
+        position = 0
+        for match in MARKUP_PATTERN.finditer(text):
+            parts.append(self.minify_text(text[position:match.start()], previous, match))
+            parts.append(match.group(0))
+            closing, name = match.group(1), match.group(2)
+            if name is not None:
+                name = name.lower()
+                if self.preserving is None and not closing and name in PRESERVE_TAGS:
+                    self.preserving = name
+                elif closing and name == self.preserving:
+                    self.preserving = None
+            previous = match
+            position = match.end()
+        parts.append(self.minify_text(text[position:], previous, None))
+        return "".join(parts)
+
+    def minify_text(self, text, before, after):
+        if self.preserving is not None or not text:
+            return text
+        text = collapse(text)
+        if is_block(before):
+            text = text.lstrip(" ")
+        if is_block(after):
+            text = text.rstrip(" ")
+        return text
+
+def enable(minifying=True):
+    global enabled
+    enabled = minifying
@@ -1,20 +1,17 @@
 from htmlnode import HTMLNode
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag=tag, value=None, children=children, props=props)
 
-    def to_html(self):
+    def iter_html(self):
         if self.tag is None:
             raise ValueError("Tag is missing")
         if self.children is None:
             raise ValueError("Children is missing")
-        props = ""
-        if self.props is not None and len(self.props) > 0:
-            for prop in self.props:
-                props += f" {prop}=\"{self.props[prop]}\""
-        children = ""
-        if len(self.children) > 0:
-            for child in self.children:
-                children += child.to_html()
-        return f"<{self.tag}{props}>{children}</{self.tag}>"
\ No newline at end of file
+        yield f"<{self.tag}{self.props_to_html()}>"
+        for child in self.children:
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
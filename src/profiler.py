@@ -0,0 +1,99 @@
+import contextlib
+import json
+import os
+import time
+
+# Build-wide profiler, None unless profiling was requested. The pipeline
+# calls stage() around each step, which costs next to nothing when disabled.
+active = None
+
+NO_STAGE = contextlib.nullcontext()
+
+class Profiler():
+    def __init__(self):
+        self.pages = {}
+        self.current = None
+        # Time spent in stages nested inside the one currently running
+        self.nested = 0.0
+
+    def start_page(self, page):
+        self.current = self.pages.setdefault(page, {})
+
+    def add(self, name, seconds):
+        if self.current is not None:
+            self.current[name] = self.current.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        # Stages record their own time only, excluding any stage nested inside
+        # them, so that per-stage totals add up to the time of the page
+        start = time.perf_counter()
+        outer_nested = self.nested
+        self.nested = 0.0
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.add(name, elapsed - self.nested)
+            self.nested = outer_nested + elapsed
+
+    def timed(self, iterable, name):
+        # Charges the time spent producing each item of a lazy iterable to name
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def take_page(self, page):
+        # Hands a page's timings back to the parent when running in a worker
+        if self.current is self.pages.get(page):
+            self.current = None
+        return self.pages.pop(page, None)
+
+    def totals(self):
+        stages = {}
+        for timings in self.pages.values():
+            for name, seconds in timings.items():
+                total = stages.setdefault(name, {"seconds": 0.0, "pages": 0})
+                total["seconds"] += seconds
+                total["pages"] += 1
+        return stages
+
+    def slowest(self, count):
+        pages = sorted(self.pages.items(), key=lambda item: item[1].get("total", 0.0), reverse=True)
+        return pages[:count]
+
+    def report(self):
+        return {"stages": self.totals(), "pages": self.pages}
+
+    def write_report(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=1, sort_keys=True)
+
+    def print_summary(self, count):
+        print(f"{'stage':<22} {'seconds':>9} {'pages':>7}")
+        for name, total in sorted(self.totals().items(), key=lambda item: item[1]["seconds"], reverse=True):
+            print(f"{name:<22} {total['seconds']:>9.4f} {total['pages']:>7}")
+        print(f"\nSlowest {count} pages:")
+        for page, timings in self.slowest(count):
+            print(f"{timings.get('total', 0.0) * 1000:>9.2f} ms  {page}")
+
+def enable(enabled=True):
+    global active
+    active = Profiler() if enabled else None
+    return active
+
+def stage(name):
+    if active is None:
+        return NO_STAGE
+    return active.stage(name)
+
+def timed(iterable, name):
+    if active is None:
+        return iterable
+    return active.timed(iterable, name)
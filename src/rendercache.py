@@ -0,0 +1,112 @@
+from manifest import GENERATOR_VERSION
+from collections import OrderedDict
+import hashlib
+import json
+import os
+
+# Build-wide cache of rendered blocks, None unless enabled
+active = None
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class RenderCache():
+    # Maps a block (with its type and the basepath it was rendered for) to
+    # its rendered HTML, the link targets in it and, when the search index is
+    # being built, the weight of its words, so blocks repeated across
+    # pages such as footers and disclaimers are only tokenized and serialized
+    # once. Least recently used fragments are evicted once max_bytes worth of
+    # HTML is cached.
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, path=None, track_added=False):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Worker processes send the fragments they rendered back to the parent
+        self.added = [] if track_added else None
+        if path is not None and os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == GENERATOR_VERSION:
+                for key, html, links, terms in data["entries"]:
+                    self.store(key, html, links, terms)
+
+    def key(self, block_type, block, basepath):
+        digest = hashlib.sha1(block.encode())
+        digest.update(f"\0{block_type.value}\0{basepath}".encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        # Returns (html, links, terms) or None
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, html, links=(), terms=None):
+        self.store(key, html, links, terms)
+        if self.added is not None:
+            self.added.append((key, html, tuple(links), terms))
+
+    def store(self, key, html, links=(), terms=None):
+        old = self.entries.get(key)
+        if old is not None:
+            # Only replaced to add the terms an older entry lacks
+            if terms is None or old[2] is not None:
+                return
+            self.size -= entry_size(old)
+        entry = (html, tuple(links), terms)
+        self.entries[key] = entry
+        self.size += entry_size(entry)
+        while self.size > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= entry_size(evicted)
+
+    def take_updates(self):
+        # Counters and new fragments since the last call, for the parent
+        updates = {"hits": self.hits, "misses": self.misses, "added": self.added or []}
+        self.hits = 0
+        self.misses = 0
+        if self.added is not None:
+            self.added = []
+        return updates
+
+    def merge(self, updates):
+        self.hits += updates["hits"]
+        self.misses += updates["misses"]
+        for key, html, links, terms in updates["added"]:
+            self.store(key, html, links, terms)
+
+    def reset_counts(self):
+        # For a cache that is kept for the next build, like a daemon's
+        self.hits = 0
+        self.misses = 0
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0.0
+        return f"Render cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), {len(self.entries)} fragments cached"
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            entries = [(key, html, links, terms) for key, (html, links, terms) in self.entries.items()]
+            json.dump({"version": GENERATOR_VERSION, "entries": entries}, f)
+        os.replace(tmp_path, self.path)
+
+def entry_size(entry):
+    # Roughly the memory an entry holds on to, dominated by its HTML
+    html, _, terms = entry
+    return len(html) + (sum(len(term) for term in terms) if terms else 0)
+
+def enable(enabled=True, max_bytes=DEFAULT_MAX_BYTES, path=None, track_added=False):
+    global active
+    active = RenderCache(max_bytes, path, track_added) if enabled else None
+    return active
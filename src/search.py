@@ -0,0 +1,162 @@
+from manifest import GENERATOR_VERSION
+import json
+import os
+import re
+
+# Full-text search index built from the text nodes as pages render, so
+# nothing has to crawl the generated HTML afterwards.
+#
+# Output, under docs/search/:
+#   index.json        {"shards": {prefix: file name}, "pages": [[url, title],
+#                     ...]} where a page's id is its position in the list
+#                     (removed pages leave a null behind so that ids stay
+#                     stable)
+#   terms.json,       {term: [[page id, weight], ...]} for the terms of a
+#   terms-<p>.json    prefix, best match first
+# A client loads index.json once and then, for each term searched for, only
+# the shard of the longest listed prefix the term starts with (shard_for).
+# Shards start out as a single one for the empty prefix, which is all a
+# small site gets, and one that holds too many postings is split by the
+# next character of its terms until every shard fits.
+
+TERM_PATTERN = re.compile(r"\w+")
+# At most this many [page id, weight] pairs go into a shard, unless they
+# all belong to a single term
+SHARD_POSTINGS = 5000
+# Words in headings count as if they appeared this many times
+HEADING_WEIGHTS = {1: 8, 2: 5, 3: 3}
+
+def add_terms(terms, text, weight):
+    for term in TERM_PATTERN.findall(text.lower()):
+        terms[term] = terms.get(term, 0) + weight
+
+def merge_terms(terms, more):
+    for term, weight in more.items():
+        terms[term] = terms.get(term, 0) + weight
+
+def heading_weight(level):
+    return HEADING_WEIGHTS.get(level, 2)
+
+def split_shards(terms):
+    # {term: postings} -> {prefix: {term: postings}}. A shard over the limit
+    # hands its terms on to one shard per next character, except for the
+    # term that is the prefix itself, which stays behind.
+    shards = {}
+    pending = [("", terms)]
+    while pending:
+        prefix, shard = pending.pop()
+        if sum(len(postings) for postings in shard.values()) <= SHARD_POSTINGS:
+            shards[prefix] = shard
+            continue
+        length = len(prefix) + 1
+        children = {}
+        for term, postings in shard.items():
+            if len(term) < length:
+                shards[prefix] = {term: postings}
+            else:
+                children.setdefault(term[:length], {})[term] = postings
+        pending.extend(children.items())
+    return shards
+
+def shard_for(term, prefixes):
+    # The shard a client looks a term up in, None if there is none
+    for length in range(len(term), -1, -1):
+        if term[:length] in prefixes:
+            return term[:length]
+    return None
+
+def shard_file(prefix):
+    # ASCII letters and digits are kept, anything else is written as its
+    # code point, e.g. terms-_e9_l.json for "él"
+    if not prefix:
+        return "terms.json"
+    name = "".join(char if char.isascii() and char.isalnum() else f"_{ord(char):x}_" for char in prefix)
+    return f"terms-{name}.json"
+
+def page_url(dest_path, dest_dir, basepath):
+    # The URL a page is served at, with index.html left off
+    url = os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+    if url == "index.html":
+        url = ""
+    elif url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return basepath + url
+
+class SearchIndex():
+    # The terms of every page are kept in cache_path between builds, so an
+    # incremental build only indexes the pages it renders again and only
+    # rewrites the shards whose terms changed
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        # dest path -> {"id", "url", "title", "terms"}
+        self.pages = {}
+        # output file -> hash of what was last written to it
+        self.shard_hashes = {}
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == GENERATOR_VERSION:
+                self.pages = data["pages"]
+                self.shard_hashes = data["shards"]
+        self.used_ids = set(page["id"] for page in self.pages.values())
+        self.next_id = 0
+
+    def new_id(self):
+        # Ids of removed pages are handed out again before new ones
+        while self.next_id in self.used_ids:
+            self.next_id += 1
+        self.used_ids.add(self.next_id)
+        return self.next_id
+
+    def add_page(self, dest_path, url, title, terms):
+        page = self.pages.get(dest_path)
+        page_id = page["id"] if page is not None else self.new_id()
+        self.pages[dest_path] = {"id": page_id, "url": url, "title": title, "terms": terms}
+
+    def retain(self, dest_paths):
+        # Drops the pages that are no longer part of the site
+        for dest_path in list(self.pages):
+            if dest_path not in dest_paths:
+                page_id = self.pages.pop(dest_path)["id"]
+                self.used_ids.discard(page_id)
+                self.next_id = min(self.next_id, page_id)
+
+    def shards(self):
+        # Returns {prefix: {term: postings}}
+        terms = {}
+        for page in self.pages.values():
+            for term, weight in page["terms"].items():
+                terms.setdefault(term, []).append([page["id"], weight])
+        for postings in terms.values():
+            postings.sort(key=lambda posting: (-posting[1], posting[0]))
+        return split_shards(terms)
+
+    def write(self, dest_dir, writer):
+        # Writes the index through writer, which leaves files whose content
+        # did not change alone when it knows their hashes
+        search_dir = os.path.join(dest_dir, "search")
+        pages = [None] * (max(self.used_ids) + 1 if self.used_ids else 0)
+        for page in self.pages.values():
+            pages[page["id"]] = [page["url"], page["title"]]
+        shards = self.shards()
+        files = {prefix: shard_file(prefix) for prefix in shards}
+        outputs = {os.path.join(search_dir, "index.json"): {"shards": files, "pages": pages}}
+        for prefix, terms in shards.items():
+            outputs[os.path.join(search_dir, files[prefix])] = terms
+        hashes = {}
+        for path, data in sorted(outputs.items()):
+            hashes[path] = writer.write(path, [json.dumps(data, separators=(",", ":"), sort_keys=True)])
+        for path in self.shard_hashes:
+            if path not in hashes and os.path.exists(path):
+                writer.remove(path)
+        self.shard_hashes = hashes
+        print(f"Search index: {len(self.pages)} pages in {len(hashes) - 1} shards under {search_dir}")
+
+    def save(self):
+        if self.cache_path is None:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": GENERATOR_VERSION, "pages": self.pages, "shards": self.shard_hashes}, f)
+        os.replace(tmp_path, self.cache_path)
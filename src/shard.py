@@ -0,0 +1,85 @@
+from manifest import FileHashes, Manifest
+import hashlib
+import heapq
+import os
+
+# Splits a build across machines. Every run discovers the same pages and
+# deals them out the same way, so `--shard i/N` on N machines renders each
+# page exactly once. The shards' manifests are then merged into one, which
+# checks that no page was missed.
+
+def parse_shard(value):
+    # "2/4" -> (2, 4). Shards are numbered from 1.
+    index, _, count = value.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, not {value!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard {index}/{count} is out of range")
+    return index, count
+
+def shard_manifest_path(manifest_path, index, count):
+    root, ext = os.path.splitext(manifest_path)
+    return f"{root}.shard-{index}-of-{count}{ext}"
+
+def stable_hash(path):
+    # Unlike hash(), the same on every machine and every run
+    return hashlib.sha1(path.replace(os.sep, "/").encode()).hexdigest()
+
+def assign_shards(pages, count, dir_path_content):
+    # Maps each destination path to its shard. Pages are handed out largest
+    # first to the shard with the least bytes so far, which keeps shards
+    # balanced even when a few pages are much bigger than the rest. Ties are
+    # broken by a hash of the path relative to the content directory, so the
+    # split doesn't depend on where the tree is checked out.
+    sized = []
+    for from_path, dest_path in pages:
+        relative = os.path.relpath(from_path, dir_path_content)
+        sized.append((-os.path.getsize(from_path), stable_hash(relative), dest_path))
+    sized.sort()
+    loads = [(0, index) for index in range(1, count + 1)]
+    shards = {}
+    for negative_size, _, dest_path in sized:
+        load, index = heapq.heappop(loads)
+        shards[dest_path] = index
+        heapq.heappush(loads, (load - negative_size, index))
+    return shards
+
+def select_shard(pages, shard, dir_path_content):
+    index, count = shard
+    shards = assign_shards(pages, count, dir_path_content)
+    return [(from_path, dest_path) for from_path, dest_path in pages if shards[dest_path] == index]
+
+def merge_manifests(manifest_path, count, pages):
+    # Combines the manifests of shards 1..count into one at manifest_path.
+    # Returns the merged manifest and a list of problems: missing shards,
+    # pages that no shard built and outputs that don't match what was built.
+    merged = Manifest(manifest_path)
+    merged.pages = {}
+    problems = []
+    for index in range(1, count + 1):
+        path = shard_manifest_path(manifest_path, index, count)
+        if not os.path.exists(path):
+            problems.append(f"Missing manifest for shard {index}/{count}: {path}")
+            continue
+        shard = Manifest(path)
+        if shard.shard != [index, count]:
+            problems.append(f"{path} was not written by shard {index}/{count}")
+            continue
+        merged.pages.update(shard.pages)
+        if index == 1:
+            # Only the first shard copies static files
+            merged.static = shard.static
+    hash_of = FileHashes()
+    for _, dest_path in pages:
+        entry = merged.pages.get(dest_path)
+        if entry is None:
+            problems.append(f"No shard built {dest_path}")
+        elif hash_of(dest_path) != entry["output"]:
+            problems.append(f"{dest_path} is missing or differs from what its shard built")
+    current = set(dest_path for _, dest_path in pages)
+    for dest_path in list(merged.pages):
+        if dest_path not in current:
+            merged.forget(dest_path)
+    return merged, problems
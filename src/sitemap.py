@@ -0,0 +1,173 @@
+from manifest import GENERATOR_VERSION
+from search import page_url
+from textnode import TextType
+from utils import BlockType, text_to_textnodes
+from datetime import datetime, timezone
+import html
+import json
+import os
+
+# sitemap.xml and an Atom feed per section, from metadata collected while
+# pages render: URL, title, when the source last changed and a summary.
+# Pages that weren't rendered keep the metadata cached from when they were,
+# so nothing has to read the Markdown again.
+#
+# Output, under docs/:
+#   sitemap.xml            every page, or with more than 50,000 pages an
+#                          index of sitemap-1.xml, sitemap-2.xml, ...
+#   <section>/feed.xml     the newest pages below docs/<section>/, not
+#                          counting <section>/index.html itself
+
+SITEMAP_LIMIT = 50000
+FEED_LIMIT = 20
+SUMMARY_LENGTH = 280
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+XML_DECLARATION = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+
+def summarize(block):
+    # Plain text of a paragraph, or None when it is nothing but links and
+    # images, like the "back home" link at the top of a post
+    nodes = [child for node in text_to_textnodes(" ".join(block.split())) for child in node.children or (node,)]
+    if all(node.text_type in (TextType.LINK, TextType.IMAGE) or not node.text.strip() for node in nodes):
+        return None
+    text = "".join(node.text for node in nodes if node.text_type != TextType.IMAGE).strip()
+    if len(text) > SUMMARY_LENGTH:
+        text = text[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "…"
+    return text
+
+def capture_summary(blocks, page):
+    # Passes blocks through while picking out the page's first paragraph
+    for block in blocks:
+        if page["summary"] is None and block[0] == BlockType.PARAGRAPH:
+            page["summary"] = summarize(block[1])
+        yield block
+
+def iso_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def section_of(dest_path, dest_dir):
+    # "blog" for docs/blog/tom/index.html, None for pages at the top and
+    # for the section's own index.html
+    parts = os.path.relpath(dest_path, dest_dir).split(os.sep)
+    if len(parts) < 2 or parts[1:] == ["index.html"]:
+        return None
+    return parts[0]
+
+def render_urlset(urls):
+    lines = [XML_DECLARATION, f"<urlset xmlns=\"{SITEMAP_NAMESPACE}\">\n"]
+    for url, updated in urls:
+        lines.append(f"<url><loc>{html.escape(url, quote=False)}</loc><lastmod>{iso_time(updated)}</lastmod></url>\n")
+    lines.append("</urlset>\n")
+    return "".join(lines)
+
+def render_sitemap_index(sitemaps):
+    lines = [XML_DECLARATION, f"<sitemapindex xmlns=\"{SITEMAP_NAMESPACE}\">\n"]
+    for url, updated in sitemaps:
+        lines.append(f"<sitemap><loc>{html.escape(url, quote=False)}</loc><lastmod>{iso_time(updated)}</lastmod></sitemap>\n")
+    lines.append("</sitemapindex>\n")
+    return "".join(lines)
+
+def render_feed(title, feed_url, section_url, entries):
+    updated = max(page["updated"] for _, page in entries)
+    lines = [
+        XML_DECLARATION,
+        f"<feed xmlns=\"{ATOM_NAMESPACE}\">\n",
+        f"<title>{html.escape(title, quote=False)}</title>\n",
+        f"<id>{html.escape(section_url, quote=False)}</id>\n",
+        f"<link rel=\"self\" href=\"{html.escape(feed_url)}\"/>\n",
+        f"<link href=\"{html.escape(section_url)}\"/>\n",
+        f"<updated>{iso_time(updated)}</updated>\n",
+    ]
+    for url, page in entries:
+        lines.append("<entry>")
+        lines.append(f"<title>{html.escape(page['title'], quote=False)}</title>")
+        lines.append(f"<id>{html.escape(url, quote=False)}</id><link href=\"{html.escape(url)}\"/>")
+        lines.append(f"<updated>{iso_time(page['updated'])}</updated>")
+        if page["summary"]:
+            lines.append(f"<summary>{html.escape(page['summary'], quote=False)}</summary>")
+        lines.append("</entry>\n")
+    lines.append("</feed>\n")
+    return "".join(lines)
+
+class SiteMap():
+    # The metadata of every page is kept in cache_path between builds, like
+    # the search index's terms
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        # dest path -> {"url", "title", "updated", "summary"}
+        self.pages = {}
+        # output file -> hash of what was last written to it
+        self.output_hashes = {}
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == GENERATOR_VERSION:
+                self.pages = data["pages"]
+                self.output_hashes = data["outputs"]
+
+    def add_page(self, dest_path, url, title, updated, summary):
+        self.pages[dest_path] = {"url": url, "title": title, "updated": updated, "summary": summary}
+
+    def retain(self, dest_paths):
+        for dest_path in list(self.pages):
+            if dest_path not in dest_paths:
+                del self.pages[dest_path]
+
+    def outputs(self, dest_dir, site_url, basepath):
+        # Returns {output path: XML text}. Page URLs already start with the
+        # basepath, site_url makes them absolute.
+        site_url = site_url.rstrip("/")
+        def absolute(path):
+            return site_url + page_url(path, dest_dir, basepath)
+
+        outputs = {}
+        urls = sorted((site_url + page["url"], page["updated"]) for page in self.pages.values())
+        sitemap_path = os.path.join(dest_dir, "sitemap.xml")
+        if len(urls) <= SITEMAP_LIMIT:
+            outputs[sitemap_path] = render_urlset(urls)
+        else:
+            sitemaps = []
+            for start in range(0, len(urls), SITEMAP_LIMIT):
+                chunk = urls[start:start + SITEMAP_LIMIT]
+                path = os.path.join(dest_dir, f"sitemap-{start // SITEMAP_LIMIT + 1}.xml")
+                outputs[path] = render_urlset(chunk)
+                sitemaps.append((absolute(path), max(updated for _, updated in chunk)))
+            outputs[sitemap_path] = render_sitemap_index(sitemaps)
+
+        sections = {}
+        for dest_path, page in self.pages.items():
+            section = section_of(dest_path, dest_dir)
+            if section is not None:
+                sections.setdefault(section, []).append((site_url + page["url"], page))
+        for section, entries in sections.items():
+            entries.sort(key=lambda entry: (-entry[1]["updated"], entry[0]))
+            section_dir = os.path.join(dest_dir, section)
+            index = self.pages.get(os.path.join(section_dir, "index.html"))
+            title = index["title"] if index is not None else section
+            feed_path = os.path.join(section_dir, "feed.xml")
+            outputs[feed_path] = render_feed(title, absolute(feed_path), absolute(os.path.join(section_dir, "index.html")), entries[:FEED_LIMIT])
+        return outputs
+
+    def write(self, dest_dir, site_url, basepath, writer):
+        # Written through writer, which leaves unchanged files alone when it
+        # knows their hashes
+        outputs = self.outputs(dest_dir, site_url, basepath)
+        hashes = {}
+        for path, text in sorted(outputs.items()):
+            hashes[path] = writer.write(path, [text])
+        for path in self.output_hashes:
+            if path not in hashes and os.path.exists(path):
+                writer.remove(path)
+        self.output_hashes = hashes
+        feeds = sum(1 for path in hashes if path.endswith("feed.xml"))
+        print(f"Sitemap: {len(self.pages)} pages in {os.path.join(dest_dir, 'sitemap.xml')}, {feeds} feeds")
+
+    def save(self):
+        if self.cache_path is None:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": GENERATOR_VERSION, "pages": self.pages, "outputs": self.output_hashes}, f)
+        os.replace(tmp_path, self.cache_path)
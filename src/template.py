@@ -0,0 +1,122 @@
+import features
+import os
+import re
+
+# Placeholders look like {{ Name }}
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# Partials are pulled in with {{> file.html }}, relative to the including file
+INCLUDE_PATTERN = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+# Root-relative URLs in the template markup, but not protocol-relative ones
+ROOT_URL_PATTERN = re.compile(r"(href|src)=\"/(?!/)")
+# The same, with the whole URL, for rewriting links to static files
+ASSET_URL_PATTERN = re.compile(r"(href|src)=\"(/(?!/)[^\"]*)\"")
+
+class Template():
+    def __init__(self, text, basepath="/", asset_map=None, minified=False):
+        # The template is split once into literal text and named slots, with
+        # the basepath already applied to the literals, and with asset_map
+        # static files referenced by their fingerprinted URLs. minified
+        # literals have their insignificant whitespace removed up front.
+        self.segments = []
+        self.minifier = None
+        if minified:
+            from minify import MarkupMinifier
+            self.minifier = MarkupMinifier()
+        self.slots = set()
+        self.asset_map = asset_map
+        # Static files the template links to
+        self.asset_sources = []
+        # Every file the template was built from, filled in by load_template
+        self.dependencies = []
+        self.versions = None
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            self.add_literal(text[position:match.start()], basepath)
+            self.segments.append((True, match.group(1)))
+            self.slots.add(match.group(1))
+            position = match.end()
+        self.add_literal(text[position:], basepath)
+
+    def add_literal(self, text, basepath):
+        if self.minifier is not None:
+            text = self.minifier.minify(text)
+        if text:
+            if self.asset_map is not None:
+                text = ASSET_URL_PATTERN.sub(self.rewrite_asset, text)
+            self.segments.append((False, ROOT_URL_PATTERN.sub(f"\\1=\"{basepath}", text)))
+
+    def rewrite_asset(self, match):
+        asset = self.asset_map.lookup(match.group(2))
+        if asset is None:
+            return match.group(0)
+        self.asset_sources.append(asset["source"])
+        return f"{match.group(1)}=\"{self.asset_map.rewrite(match.group(2))}\""
+
+    def iter_render(self, values):
+        # Slot values are strings, HTML nodes or iterables of HTML fragments
+        for is_slot, segment in self.segments:
+            if not is_slot:
+                yield segment
+                continue
+            if segment not in values:
+                raise ValueError(f"No value for template placeholder {segment}")
+            value = values[segment]
+            if isinstance(value, str):
+                yield value
+            elif hasattr(value, "iter_html"):
+                yield from value.iter_html()
+            else:
+                yield from value
+
+    def render(self, values):
+        return "".join(self.iter_render(values))
+
+def read_template(path, including=()):
+    # Returns the template text with its partials expanded, and the list of
+    # every file that went into it
+    if path in including:
+        raise ValueError(f"Template {path} includes itself")
+    with open(path, 'r') as f:
+        text = f.read()
+    dependencies = [path]
+    parts = []
+    position = 0
+    for match in INCLUDE_PATTERN.finditer(text):
+        partial_path = os.path.join(os.path.dirname(path), match.group(1))
+        partial_text, partial_dependencies = read_template(partial_path, including + (path,))
+        parts.append(text[position:match.start()])
+        parts.append(partial_text)
+        dependencies.extend(partial_dependencies)
+        position = match.end()
+    parts.append(text[position:])
+    return "".join(parts), dependencies
+
+def file_versions(paths):
+    versions = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        versions.append((stat.st_mtime_ns, stat.st_size))
+    return versions
+
+compiled_templates = {}
+
+def load_template(path, basepath="/"):
+    # Compiled templates are cached for the whole build and only re-parsed
+    # when the template or one of its partials changes on disk. Paths are
+    # relative, and a build daemon may serve builds from several directories.
+    asset_map = features.asset_map()
+    minified = features.minifying()
+    key = (os.getcwd(), path, basepath, asset_map.digest if asset_map is not None else None, minified)
+    cached = compiled_templates.get(key)
+    if cached is not None and file_versions(cached.dependencies) == cached.versions:
+        return cached
+    text, dependencies = read_template(path)
+    template = Template(text, basepath, asset_map, minified)
+    template.dependencies = dependencies + template.asset_sources
+    # Linked static files count too, a changed one has a new name
+    template.versions = file_versions(template.dependencies)
+    compiled_templates[key] = template
+    return template
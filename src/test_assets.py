@@ -0,0 +1,130 @@
+import contextlib
+import io
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+import assets
+from assets import AssetMap, fingerprint_path, probe_image
+from copystatic import sync_static
+import template
+from template import load_template
+from textnode import TextNode, TextType
+from utils import text_node_to_html_node
+
+PNG = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 640, 480) + b"\x08\x06\x00\x00\x00"
+GIF = b"GIF89a" + struct.pack("<HH", 16, 8) + b"\x00" * 20
+WEBP_LOSSY = b"RIFF\x00\x00\x00\x00WEBPVP8 \x00\x00\x00\x00\x00\x00\x00\x9d\x01\x2a" + struct.pack("<HH", 300, 200) + b"\x00" * 4
+WEBP_LOSSLESS = b"RIFF\x00\x00\x00\x00WEBPVP8L\x00\x00\x00\x00\x2f" + ((99) | (49 << 14)).to_bytes(4, "little") + b"\x00" * 8
+WEBP_EXTENDED = b"RIFF\x00\x00\x00\x00WEBPVP8X\x00\x00\x00\x00\x00\x00\x00\x00" + (1919).to_bytes(3, "little") + (1079).to_bytes(3, "little")
+# Start of image, an APP0 segment to skip, then a baseline frame header
+JPEG = b"\xff\xd8\xff\xe0" + struct.pack(">H", 6) + b"JFIF" + b"\xff\xc0" + struct.pack(">HBHH", 11, 8, 720, 1280) + b"\x00" * 6
+
+
+class TestProbeImage(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def probe(self, data):
+        path = os.path.join(self.tmp, "image")
+        with open(path, 'wb') as f:
+            f.write(data)
+        return probe_image(path)
+
+    def test_formats(self):
+        self.assertEqual(self.probe(PNG), (640, 480))
+        self.assertEqual(self.probe(GIF), (16, 8))
+        self.assertEqual(self.probe(WEBP_LOSSY), (300, 200))
+        self.assertEqual(self.probe(WEBP_LOSSLESS), (100, 50))
+        self.assertEqual(self.probe(WEBP_EXTENDED), (1920, 1080))
+        self.assertEqual(self.probe(JPEG), (1280, 720))
+
+    def test_unknown_and_truncated(self):
+        self.assertIsNone(self.probe(b"not an image"))
+        self.assertIsNone(self.probe(JPEG[:12]))
+
+    def test_fingerprint_path(self):
+        self.assertEqual(fingerprint_path("images/tom.png", "0123456789abcdef"), "images/tom.01234567.png")
+
+
+class TestAssetMap(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.static = os.path.join(self.tmp, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write("images/a.png", PNG)
+        self.write("index.css", b"body {}")
+        self.cache_path = os.path.join(self.tmp, "assets.json")
+
+    def tearDown(self):
+        assets.enable(None)
+        self._tmp.cleanup()
+
+    def write(self, relative, data):
+        with open(os.path.join(self.static, relative), 'wb') as f:
+            f.write(data)
+
+    def test_map_and_rewrite(self):
+        asset_map = AssetMap(self.static)
+        image = asset_map.lookup("/images/a.png")
+        self.assertEqual((image["width"], image["height"]), (640, 480))
+        self.assertRegex(image["url"], r"^/images/a\.[0-9a-f]{8}\.png$")
+        self.assertEqual(asset_map.rewrite("/images/a.png#x"), image["url"] + "#x")
+        self.assertEqual(asset_map.rewrite("/missing.png"), "/missing.png")
+        self.assertEqual(asset_map.dest_path(os.path.join("images", "a.png")), image["url"][1:])
+
+    def test_unchanged_files_are_not_read_again(self):
+        AssetMap(self.static, self.cache_path).save()
+        cached = AssetMap(self.static, self.cache_path)
+        source = os.path.join(self.static, "index.css")
+        # A cached hash is trusted while size and mtime are unchanged
+        cached.stats[source][2] = "f" * 64
+        cached.save()
+        self.assertEqual(AssetMap(self.static, self.cache_path).lookup("/index.css")["hash"], "f" * 64)
+        self.write("index.css", b"body { margin: 0 }")
+        self.assertNotEqual(AssetMap(self.static, self.cache_path).lookup("/index.css")["hash"], "f" * 64)
+
+    def test_images_links_and_templates_use_fingerprinted_urls(self):
+        asset_map = assets.enable(AssetMap(self.static))
+        image_url = asset_map.lookup("/images/a.png")["url"]
+        node = text_node_to_html_node(TextNode("A", TextType.IMAGE, "/images/a.png"), "/site/")
+        self.assertEqual(node.to_html(), f"<img src=\"/site{image_url}\" alt=\"A\" width=\"640\" height=\"480\"></img>")
+        node = text_node_to_html_node(TextNode("elsewhere", TextType.IMAGE, "https://example.com/b.png"))
+        self.assertEqual(node.props, {"src": "https://example.com/b.png", "alt": "elsewhere"})
+
+        template_path = os.path.join(self.tmp, "template.html")
+        with open(template_path, 'w') as f:
+            f.write("<link href=\"/index.css\"><a href=\"/blog\">{{ Content }}</a>")
+        template = load_template(template_path, "/site/")
+        css_url = asset_map.lookup("/index.css")["url"]
+        self.assertEqual(template.render({"Content": ""}), f"<link href=\"/site{css_url}\"><a href=\"/site/blog\"></a>")
+        self.assertIn(os.path.join(self.static, "index.css"), template.dependencies)
+
+    def test_templates_linking_assets_are_compiled_once(self):
+        assets.enable(AssetMap(self.static))
+        template_path = os.path.join(self.tmp, "template.html")
+        with open(template_path, 'w') as f:
+            f.write("<link href=\"/index.css\">{{ Content }}")
+        with mock.patch.object(template, "read_template", wraps=template.read_template) as read:
+            first = load_template(template_path)
+            self.assertIs(load_template(template_path), first)
+        self.assertEqual(read.call_count, 1)
+
+    def test_static_files_are_published_under_new_names(self):
+        asset_map = AssetMap(self.static)
+        docs = os.path.join(self.tmp, "docs")
+        with contextlib.redirect_stdout(io.StringIO()):
+            sync_static(self.static, docs, rename=asset_map.dest_path)
+        self.assertTrue(os.path.exists(os.path.join(docs, asset_map.lookup("/images/a.png")["url"][1:])))
+        self.assertFalse(os.path.exists(os.path.join(docs, "images", "a.png")))
+
+
+if __name__ == "__main__":
+    unittest.main()
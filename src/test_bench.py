@@ -0,0 +1,24 @@
+import random
+import unittest
+
+from bench import CORPORA, compare, corpus_pages
+from utils import markdown_to_html_node
+
+
+class TestBench(unittest.TestCase):
+    def test_corpora_are_deterministic_and_render(self):
+        for name in CORPORA:
+            first = list(corpus_pages(name, 0.01, random.Random(name)))
+            second = list(corpus_pages(name, 0.01, random.Random(name)))
+            self.assertEqual(first, second)
+            markdown_to_html_node(first[0][1]).to_html()
+
+    def test_compare(self):
+        baseline = {"a": {"pipeline_mb_per_sec": 10.0, "build_mb_per_sec": 10.0}}
+        results = {"a": {"pipeline_mb_per_sec": 9.0, "build_mb_per_sec": 7.0}}
+        self.assertEqual(compare(results, baseline, 0.2), ["a.build_mb_per_sec"])
+        self.assertEqual(compare(results, {}, 0.2), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
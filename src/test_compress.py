@@ -0,0 +1,83 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import Compressor, compress_file, sibling_path
+from writer import ChangeList
+
+PAGE = ("<p>" + "the same words again and again " * 40 + "</p>").encode()
+
+
+class TestCompressor(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.docs = os.path.join(self.tmp, "docs")
+        self.cache_path = os.path.join(self.tmp, "compress.json")
+        self.write("index.html", PAGE)
+        self.write("index.css", b"body { margin: 0 }" * 20)
+        self.write("images/tom.png", b"\x89PNG" * 100)
+        self.write("small.html", b"<p>hi</p>")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def path(self, relative):
+        return os.path.join(self.docs, relative)
+
+    def write(self, relative, data):
+        os.makedirs(os.path.dirname(self.path(relative)), exist_ok=True)
+        with open(self.path(relative), 'wb') as f:
+            f.write(data)
+
+    def run_compressor(self, changes=None):
+        compressor = Compressor(self.cache_path, ["gz"], jobs=2)
+        compressor.run(self.docs, changes)
+        compressor.save()
+        return compressor
+
+    def test_text_files_get_compressed_copies(self):
+        compressor = self.run_compressor()
+        with gzip.open(self.path("index.html.gz"), 'rb') as f:
+            self.assertEqual(f.read(), PAGE)
+        self.assertTrue(os.path.exists(self.path("index.css.gz")))
+        self.assertFalse(os.path.exists(self.path("images/tom.png.gz")))
+        self.assertFalse(os.path.exists(self.path("small.html.gz")))
+        self.assertEqual(compressor.compressed, 2)
+        self.assertIn("Compressed 2 files, 0 unchanged", compressor.summary())
+
+    def test_unchanged_files_are_skipped(self):
+        self.run_compressor()
+        changes = ChangeList()
+        compressor = self.run_compressor(changes)
+        self.assertEqual((compressor.compressed, compressor.unchanged), (0, 2))
+        self.assertEqual(changes.written, set())
+
+        # Rewritten with other content, or with its copy deleted
+        self.write("index.html", PAGE + b"<p>more</p>")
+        os.remove(self.path("index.css.gz"))
+        compressor = self.run_compressor(changes)
+        self.assertEqual((compressor.compressed, compressor.unchanged), (2, 0))
+        self.assertEqual(changes.written, {self.path("index.html.gz"), self.path("index.css.gz")})
+        with gzip.open(self.path("index.html.gz"), 'rb') as f:
+            self.assertTrue(f.read().endswith(b"<p>more</p>"))
+
+    def test_copies_of_removed_files_are_removed(self):
+        self.run_compressor()
+        os.remove(self.path("index.css"))
+        changes = ChangeList()
+        self.run_compressor(changes)
+        self.assertFalse(os.path.exists(self.path("index.css.gz")))
+        self.assertEqual(changes.removed, {self.path("index.css.gz")})
+
+    def test_incompressible_files_get_no_copy(self):
+        path = self.path("random.txt")
+        self.write("random.txt", os.urandom(1024))
+        size, sizes = compress_file(path, ["gz"])
+        self.assertEqual((size, sizes), (1024, {"gz": None}))
+        self.assertFalse(os.path.exists(sibling_path(path, "gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from copystatic import copy_file, sync_static
+from manifest import Manifest
+from writer import ChangeList
+
+
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.static = os.path.join(self.tmp, "static")
+        self.docs = os.path.join(self.tmp, "docs")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.manifest = Manifest(os.path.join(self.tmp, "manifest.json"))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def sync(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return sync_static(self.static, self.docs, self.manifest, **kwargs)
+
+    def test_copy_file(self):
+        dest = os.path.join(self.tmp, "copy.css")
+        copy_file(os.path.join(self.static, "index.css"), dest)
+        with open(dest) as f:
+            self.assertEqual(f.read(), "body {}")
+
+    def test_only_changed_files_are_copied(self):
+        self.assertEqual(len(self.sync()), 2)
+        self.assertEqual(self.sync(), [])
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual(self.sync(), [(os.path.join(self.static, "index.css"), os.path.join(self.docs, "index.css"))])
+
+    def test_generated_files_are_kept_and_stale_files_removed(self):
+        self.sync()
+        self.write(os.path.join(self.docs, "index.html"), "<p>page</p>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        changes = ChangeList()
+        self.sync(changes=changes)
+        self.assertEqual(changes.written, set())
+        self.assertEqual(changes.removed, {os.path.join(self.docs, "images", "a.png")})
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", "a.png")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_checksum_and_link(self):
+        self.sync(link=True)
+        source = os.stat(os.path.join(self.static, "index.css"))
+        dest = os.stat(os.path.join(self.docs, "index.css"))
+        self.assertEqual(source.st_ino, dest.st_ino)
+        self.assertEqual(self.sync(checksum=True), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import daemon
+
+
+def fake_run(argv):
+    print(f"ran {' '.join(argv)} in {os.path.basename(os.getcwd())}")
+    if argv == ["fail"]:
+        sys.exit("usage: no")
+    if argv == ["crash"]:
+        raise ValueError("boom")
+    return len(argv)
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self._tmp.name, "daemon.sock")
+        self.cwd = os.getcwd()
+        with contextlib.redirect_stdout(io.StringIO()):
+            thread = threading.Thread(target=daemon.serve, args=(self.socket_path, fake_run), daemon=True)
+            thread.start()
+            for _ in range(100):
+                if os.path.exists(self.socket_path):
+                    break
+                time.sleep(0.01)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self._tmp.cleanup()
+
+    def send(self, argv):
+        # The daemon runs in a thread of this process here, so output is
+        # collected in its own buffer rather than through sys.stdout
+        out = io.StringIO()
+        status = daemon.send(self.socket_path, argv, out)
+        return status, out.getvalue()
+
+    def test_runs_commands_in_the_client_directory(self):
+        site = os.path.join(self._tmp.name, "site")
+        os.mkdir(site)
+        os.chdir(site)
+        self.assertEqual(self.send(["build", "/base/"]), (2, "ran build /base/ in site\n"))
+        self.assertEqual(os.getcwd(), site)
+
+    def test_exit_and_errors_are_reported(self):
+        self.assertEqual(self.send(["fail"])[0], 1)
+        self.assertIn("usage: no", self.send(["fail"])[1])
+        status, out = self.send(["crash"])
+        self.assertEqual(status, 1)
+        self.assertIn("ValueError: boom", out)
+        # Still serving after a failed command
+        self.assertEqual(self.send(["a"])[0], 1)
+
+    def test_no_daemon(self):
+        out = io.StringIO()
+        status = daemon.send(os.path.join(self._tmp.name, "missing.sock"), [], out)
+        self.assertEqual(status, 2)
+        self.assertIn("No build daemon", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
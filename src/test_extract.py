@@ -1,6 +1,6 @@
 import unittest
 
-from extract import extract_markdown_images, extract_markdown_links, extract_title
+from extract import extract_markdown_images, extract_markdown_links, extract_title, scan_images_and_links, TitleCapture
 
 class TestExtractMarkdownImages(unittest.TestCase):
    def test_extract_markdown_images(self):
@@ -28,6 +28,13 @@ class TestExtractMarkdownLinks(unittest.TestCase):
     )
     self.assertListEqual([("link1", "https://example.com"),("link2", "https://example.com")], matches)
 
+class TestScanImagesAndLinks(unittest.TestCase):
+   def test_spans(self):
+    text = "See ![alt](a.png) and [docs](/docs) [broken]"
+    spans = list(scan_images_and_links(text))
+    self.assertEqual(spans, [(4, 17, True, "alt", "a.png"), (22, 35, False, "docs", "/docs")])
+    self.assertEqual(text[22:35], "[docs](/docs)")
+
 class TestExtractMarkdownTitle(unittest.TestCase):
     def test_extract_markdown_title(self):
         matches = extract_title("# Test")
@@ -44,5 +51,10 @@ class TestExtractMarkdownTitle(unittest.TestCase):
         with self.assertRaises(Exception):
             extract_title("Test")
 
+    def test_title_capture(self):
+        lines = TitleCapture(["Intro\n", "# Test\n", "# Other\n"])
+        self.assertEqual(list(lines), ["Intro\n", "# Test\n", "# Other\n"])
+        self.assertEqual(lines.title, "Test")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,189 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import assets
+import rendercache
+from assets import AssetMap
+from generate import find_pages, generate_pages_recursive
+from linkcheck import LinkIndex
+from manifest import Manifest
+from writer import ChangeList, StreamWriter, ThreadedWriter
+
+TEMPLATE = "<title>{{ Title }}</title><a href=\"/x\"></a>{{ Content }}"
+
+
+class GenerateTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.content = os.path.join(self.tmp, "content")
+        self.docs = os.path.join(self.tmp, "docs")
+        self.template = os.path.join(self.tmp, "template.html")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nA **post**")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, *parts):
+        with open(os.path.join(self.docs, *parts)) as f:
+            return f.read()
+
+    def build(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            generate_pages_recursive(self.content, self.template, self.docs, "/base/", **kwargs)
+        return out.getvalue()
+
+
+class TestGeneratePages(GenerateTestCase):
+    def test_find_pages(self):
+        pages = sorted(find_pages(self.content, self.docs))
+        self.assertEqual(pages, [
+            (os.path.join(self.content, "blog", "post", "index.md"), os.path.join(self.docs, "blog", "post", "index.html")),
+            (os.path.join(self.content, "index.md"), os.path.join(self.docs, "index.html")),
+        ])
+
+    def test_generate_pages_recursive(self):
+        self.build()
+        self.assertEqual(
+            self.read("blog", "post", "index.html"),
+            "<title>Post</title><a href=\"/base/x\"></a><div><h1>Post</h1><p>A <b>post</b></p></div>\n",
+        )
+
+    def test_parallel_build_matches_serial(self):
+        self.build()
+        serial = [self.read("index.html"), self.read("blog", "post", "index.html")]
+        self.build(jobs=2)
+        self.assertEqual([self.read("index.html"), self.read("blog", "post", "index.html")], serial)
+
+    def test_parallel_build_fills_the_render_cache(self):
+        # Without a cache file too, the workers' fragments reach the parent
+        cache = rendercache.enable()
+        self.addCleanup(rendercache.enable, False)
+        self.build(jobs=2)
+        self.assertEqual(len(cache.entries), 4)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+
+    def test_threaded_writer_matches_serial(self):
+        self.build()
+        serial = [self.read("index.html"), self.read("blog", "post", "index.html")]
+        for jobs in (1, 2):
+            os.remove(os.path.join(self.docs, "index.html"))
+            writer = ThreadedWriter()
+            self.build(jobs=jobs, writer=writer)
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                writer.close()
+            self.assertEqual([self.read("index.html"), self.read("blog", "post", "index.html")], serial)
+            self.assertEqual(out.getvalue(), "Wrote 2 pages, 0 unchanged\n")
+
+    def test_failed_pages_are_reported(self):
+        self.write(os.path.join(self.content, "broken.md"), "No title here")
+        for jobs in (1, 2):
+            if os.path.exists(os.path.join(self.docs, "index.html")):
+                os.remove(os.path.join(self.docs, "index.html"))
+            with self.assertRaises(Exception) as cm:
+                self.build(jobs=jobs)
+            self.assertIn("1 of 3 pages failed", str(cm.exception))
+            # The other pages are still generated, including those after it
+            self.assertIn("Home", self.read("index.html"))
+
+
+class TestIncrementalBuild(GenerateTestCase):
+    def test_only_changed_pages_are_rebuilt(self):
+        manifest = Manifest(os.path.join(self.tmp, "manifest.json"))
+        self.assertIn("Rebuilt 2 of 2 pages", self.build(manifest=manifest))
+        self.assertIn("Rebuilt 0 of 2 pages", self.build(manifest=manifest))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        self.assertIn("Rebuilt 1 of 2 pages", self.build(manifest=manifest))
+        self.assertIn("Changed", self.read("index.html"))
+
+    def test_toggling_assets_rebuilds_everything(self):
+        static = os.path.join(self.tmp, "static")
+        self.write(os.path.join(static, "x"), "x")
+        manifest = Manifest(os.path.join(self.tmp, "manifest.json"))
+        self.build(manifest=manifest)
+        try:
+            asset_map = assets.enable(AssetMap(static))
+            self.assertIn("Rebuilt 2 of 2 pages", self.build(manifest=manifest))
+            self.assertIn(f"href=\"/base/{asset_map.rewrite('/x')[1:]}\"", self.read("index.html"))
+            self.assertIn("Rebuilt 0 of 2 pages", self.build(manifest=manifest))
+        finally:
+            assets.enable(None)
+        self.assertIn("Rebuilt 2 of 2 pages", self.build(manifest=manifest))
+        self.assertIn("href=\"/base/x\"", self.read("index.html"))
+
+    def test_template_change_rebuilds_everything(self):
+        manifest = Manifest(os.path.join(self.tmp, "manifest.json"))
+        self.build(manifest=manifest)
+        self.write(self.template, "<h2>{{ Title }}</h2>{{ Content }}")
+        self.assertIn("Rebuilt 2 of 2 pages", self.build(manifest=manifest))
+
+    def test_partial_change_rebuilds_dependent_pages(self):
+        partial = os.path.join(self.tmp, "footer.html")
+        self.write(partial, "<footer>one</footer>")
+        self.write(self.template, "{{ Content }}{{> footer.html }}")
+        manifest = Manifest(os.path.join(self.tmp, "manifest.json"))
+        self.build(manifest=manifest)
+        self.assertIn("Rebuilt 0 of 2 pages", self.build(manifest=manifest))
+        self.write(partial, "<footer>two</footer>")
+        self.assertIn("Rebuilt 2 of 2 pages", self.build(manifest=manifest))
+        self.assertTrue(self.read("index.html").endswith("<footer>two</footer>\n"))
+        for entry in manifest.pages.values():
+            self.assertIn(partial, entry["deps"])
+
+    def test_removed_source_deletes_output(self):
+        manifest = Manifest(os.path.join(self.tmp, "manifest.json"))
+        self.build(manifest=manifest)
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.assertIn("removed 1", self.build(manifest=manifest))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "post", "index.html")))
+
+    def test_forced_build_leaves_unchanged_output_alone(self):
+        manifest = Manifest(os.path.join(self.tmp, "manifest.json"))
+        self.build(manifest=manifest)
+        home = os.path.join(self.docs, "index.html")
+        post = os.path.join(self.docs, "blog", "post", "index.html")
+        mtimes = {path: os.stat(path).st_mtime_ns for path in (home, post)}
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.write(os.path.join(self.content, "new.md"), "# New")
+        changes = ChangeList()
+        writer = StreamWriter(known_hashes=manifest.output_hashes(), changes=changes)
+        out = self.build(manifest=manifest, writer=writer, force=True)
+        self.assertIn("Rebuilt 2 of 2 pages", out)
+        self.assertNotEqual(os.stat(home).st_mtime_ns, mtimes[home])
+        self.assertEqual(changes.written, {home, os.path.join(self.docs, "new.html")})
+        self.assertEqual(changes.removed, {post})
+        # Rendering again with nothing changed writes nothing
+        changes = ChangeList()
+        writer = StreamWriter(known_hashes=manifest.output_hashes(), changes=changes)
+        mtime = os.stat(home).st_mtime_ns
+        self.build(manifest=manifest, writer=writer, force=True, jobs=2)
+        self.assertEqual(os.stat(home).st_mtime_ns, mtime)
+        self.assertEqual(changes.written, set())
+        self.assertEqual(writer.skipped, 2)
+
+    def test_link_index_covers_fresh_pages(self):
+        manifest = Manifest(os.path.join(self.tmp, "manifest.json"))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post) [gone](/nowhere)")
+        self.build(manifest=manifest)
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\n[home](/) [also gone](/x.png)")
+        link_index = LinkIndex(self.docs)
+        self.assertIn("Rebuilt 1 of 2 pages", self.build(manifest=manifest, link_index=link_index))
+        self.assertEqual([(os.path.basename(source), url) for source, _, url in link_index.broken()], [
+            ("index.md", "/x.png"),
+            ("index.md", "/nowhere"),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
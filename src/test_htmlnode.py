@@ -1,6 +1,6 @@
 import unittest
 
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, EMPTY_PROPS
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -22,6 +22,16 @@ class TestHTMLNode(unittest.TestCase):
         self.assertTrue(' href="https://example.com"' in result)
         self.assertTrue(' target="_blank"' in result)
 
+    def test_to_html_with_children(self):
+        node = HTMLNode("p", None, [HTMLNode(None, "text"), HTMLNode("img", None, None, {"src": "/a.png"})], {})
+        self.assertEqual(node.to_html(), '<p>text<img src="/a.png"></p>')
+
+    def test_compact_nodes(self):
+        node = HTMLNode("".join(["h", "2"]), None, [], EMPTY_PROPS)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertIs(node.tag, "h2")
+        self.assertEqual(node.props_to_html(), "")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from linkcheck import LinkIndex, is_external, resolve
+
+
+class TestResolve(unittest.TestCase):
+    def test_external(self):
+        for url in ("https://example.com", "mailto:a@b.c", "//cdn.example.com/x.js", "#top"):
+            self.assertTrue(is_external(url), url)
+        for url in ("/blog", "tom.png", "../index.html", "notes/a:b"):
+            self.assertFalse(is_external(url), url)
+
+    def test_resolve(self):
+        page = "docs/blog/tom/index.html"
+        self.assertEqual(resolve("/images/tom.png", page, "docs"), "docs/images/tom.png")
+        self.assertEqual(resolve("/blog/tom#intro", page, "docs"), "docs/blog/tom")
+        self.assertEqual(resolve("../majesty/?x=1", page, "docs"), "docs/blog/majesty")
+        self.assertEqual(resolve("/", page, "docs/"), "docs")
+        self.assertIsNone(resolve("https://example.com", page, "docs"))
+
+
+class TestLinkIndex(unittest.TestCase):
+    def test_broken_links_with_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            with open(source, 'w') as f:
+                f.write("# Home\n\n[ok](/blog)\n\n[gone](/missing)\n![pic](/images/a.png)\n\nAgain [gone](/missing)\n")
+            static = os.path.join(tmp, "static")
+            os.makedirs(os.path.join(static, "images"))
+            with open(os.path.join(static, "images", "a.png"), 'w') as f:
+                f.write("png")
+            index = LinkIndex("docs")
+            index.add_static(static)
+            index.add_page("docs/index.html", source, ["/blog", "/missing", "/images/a.png", "/missing", "https://example.com"])
+            index.add_page("docs/blog/index.html", "blog.md", ["/", "/images/b.png"])
+            self.assertEqual(index.broken(), [
+                ("blog.md", 0, "/images/b.png"),
+                (source, 5, "/missing"),
+                (source, 8, "/missing"),
+            ])
+
+
+if __name__ == "__main__":
+    unittest.main()
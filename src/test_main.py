@@ -0,0 +1,75 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import main
+
+
+class TestCommands(unittest.TestCase):
+    def test_help_lists_commands(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(main.run(["--help"]), 0)
+        for command in main.COMMANDS:
+            self.assertIn(f"  {command}", out.getvalue())
+
+    def test_daemon_refuses_commands_that_never_finish(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(main.run_in_daemon(["watch"]), 2)
+        self.assertIn("can't run on the daemon", out.getvalue())
+
+    def test_build_options_are_checked(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            with self.assertRaises(SystemExit):
+                main.run(["/base/", "--changed-files", "changes.json"])
+        self.assertIn("--changed-files needs --incremental, --skip-unchanged or --shard", err.getvalue())
+
+
+class TestBuildsInOneProcess(unittest.TestCase):
+    # Like a daemon, which runs every build in the same process
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self._tmp.name)
+        os.makedirs("content")
+        os.makedirs("static")
+        for name, text in (("template.html", "{{ Content }}"), ("content/index.md", "# Home\n\nSame\n\nSame"), ("static/index.css", "body {}")):
+            with open(name, 'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        main.disable("rendercache", False)
+        main.disable("minify", False)
+        os.chdir(self.cwd)
+        self._tmp.cleanup()
+
+    def build(self, *argv):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(main.run(list(argv)), 0)
+        return out.getvalue()
+
+    def test_features_and_counts_do_not_carry_over(self):
+        self.assertIn("Render cache: 1 hits, 2 misses", self.build("--render-cache", "--minify"))
+        self.assertIn("Render cache: 3 hits, 0 misses", self.build("--render-cache", "--minify"))
+        self.build()
+        self.assertIsNone(sys.modules["rendercache"].active)
+        self.assertFalse(sys.modules["minify"].enabled)
+        with open("docs/index.html") as f:
+            self.assertTrue(f.read().endswith("\n"))
+
+    def test_plain_build_leaves_feature_modules_unloaded(self):
+        # In a process of its own, as nothing else may have loaded them
+        src = os.path.dirname(os.path.abspath(main.__file__))
+        script = (
+            f"import sys; sys.path.insert(0, {src!r}); import main; main.run(['/'])\n"
+            "print(*sorted(name for name in ('assets', 'minify', 'profiler', 'rendercache', 'search') if name in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.splitlines()[-1], "")
+
+
+if __name__ == "__main__":
+    unittest.main()
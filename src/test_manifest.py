@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from manifest import FileHashes, Manifest, hash_bytes, hash_file
+
+
+class TestManifest(unittest.TestCase):
+    def test_hash_file_matches_hash_bytes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'wb') as f:
+                f.write(b"# Title")
+            self.assertEqual(hash_file(path), hash_bytes(b"# Title"))
+
+    def test_is_fresh_requires_same_params_deps_and_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = os.path.join(tmp, "index.html")
+            source = os.path.join(tmp, "index.md")
+            with open(source, 'w') as f:
+                f.write("# Title")
+            manifest = Manifest(os.path.join(tmp, "manifest.json"))
+            manifest.record(dest, {"basepath": "/"}, {source: hash_file(source)}, "out")
+            # Output file has not been written yet
+            self.assertFalse(manifest.is_fresh(dest, {"basepath": "/"}, FileHashes()))
+            open(dest, 'w').close()
+            self.assertTrue(manifest.is_fresh(dest, {"basepath": "/"}, FileHashes()))
+            self.assertFalse(manifest.is_fresh(dest, {"basepath": "/x/"}, FileHashes()))
+            with open(source, 'w') as f:
+                f.write("# Changed")
+            self.assertFalse(manifest.is_fresh(dest, {"basepath": "/"}, FileHashes()))
+
+    def test_missing_dependency_is_stale(self):
+        hash_of = FileHashes()
+        self.assertIsNone(hash_of("/does/not/exist"))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "manifest.json")
+            manifest = Manifest(path)
+            manifest.record("docs/index.html", {"basepath": "/"}, {"index.md": "a"}, "out")
+            manifest.save()
+            self.assertEqual(Manifest(path).pages, manifest.pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+import minify
+from htmlnode import HTMLNode
+from leafnode import LeafNode
+from minify import MarkupMinifier, iter_html
+from parentnode import ParentNode
+from template import Template
+from utils import iter_markdown_html, scan_blocks
+
+
+class TestMinifyNodes(unittest.TestCase):
+    def test_text_whitespace_collapses(self):
+        node = ParentNode("p", [LeafNode(None, "one\n  two  "), LeafNode("b", "three\tfour")])
+        self.assertEqual("".join(iter_html(node)), "<p>one two <b>three four</b></p>")
+
+    def test_whitespace_between_blocks_is_dropped(self):
+        node = ParentNode("div", [
+            LeafNode(None, "\n  "),
+            ParentNode("p", [LeafNode(None, "a")]),
+            LeafNode(None, "\n"),
+            ParentNode("p", [LeafNode(None, "b")]),
+        ])
+        self.assertEqual("".join(iter_html(node)), "<div><p>a</p><p>b</p></div>")
+
+    def test_whitespace_between_inline_nodes_is_kept(self):
+        node = ParentNode("p", [LeafNode("b", "a"), LeafNode(None, "\n\n"), LeafNode("i", "b")])
+        self.assertEqual("".join(iter_html(node)), "<p><b>a</b> <i>b</i></p>")
+
+    def test_code_blocks_are_kept(self):
+        code = "def f():\n    return  1\n"
+        node = HTMLNode("pre", None, [HTMLNode("code", None, [LeafNode(None, code)])])
+        self.assertEqual("".join(iter_html(node)), f"<pre><code>{code}</code></pre>")
+
+    def test_same_html_as_regular_markdown_output(self):
+        markdown = "# Title\n\nSome *text*\n\n- one\n- two\n\n```\nx  =  1\n```"
+        regular = "".join(iter_markdown_html(scan_blocks(markdown.splitlines(True))))
+        minify.enable()
+        try:
+            minified = "".join(iter_markdown_html(scan_blocks(markdown.splitlines(True))))
+        finally:
+            minify.enable(False)
+        self.assertEqual(minified, regular)
+
+
+class TestMinifyMarkup(unittest.TestCase):
+    def test_template_whitespace(self):
+        text = "<!doctype html>\n<html>\n  <head>\n    <title>A   title</title>\n  </head>\n  <body>\n    <p>Hi <b>there</b>\n    you</p>\n  </body>\n</html>\n"
+        self.assertEqual(
+            MarkupMinifier().minify(text),
+            "<!doctype html><html><head><title>A title</title></head><body><p>Hi <b>there</b> you</p></body></html>",
+        )
+
+    def test_preserved_across_pieces(self):
+        minifier = MarkupMinifier()
+        self.assertEqual(minifier.minify("<div>\n  <pre>  a\n"), "<div><pre>  a\n")
+        self.assertEqual(minifier.minify("  b </pre>\n  </div>"), "  b </pre></div>")
+
+    def test_template_is_minified_at_compile_time(self):
+        template = Template("<html>\n  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>\n", minified=True)
+        self.assertEqual(template.segments, [(False, "<html><body><article>"), (True, "Content"), (False, "</article></body></html>")])
+        template = Template("<p>\n  {{ Title }}  by  {{ Author }}\n</p>", minified=True)
+        self.assertEqual(template.render({"Title": "T", "Author": "A"}), "<p>T by A</p>")
+
+    def test_attributes_are_untouched(self):
+        text = "<div>\n<img alt=\"a  >  b\" src=\"/x.png\">\n</div>"
+        self.assertEqual(MarkupMinifier().minify(text), "<div><img alt=\"a  >  b\" src=\"/x.png\"></div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
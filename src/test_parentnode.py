@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from parentnode import ParentNode
@@ -61,6 +62,22 @@ class TestParentNode(unittest.TestCase):
             '<section id="main"><a href="https://example.com">link</a><div class="content"><p>paragraph</p></div></section>'
         )
 
+    # Test streaming output matches to_html
+    def test_write_html_matches_to_html(self):
+        child = ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])
+        parent = ParentNode("div", [child, LeafNode("a", "link", {"href": "/x"})])
+        buffer = io.StringIO()
+        parent.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), parent.to_html())
+        self.assertEqual("".join(parent.iter_html()), parent.to_html())
+
+    # Test very wide nodes stream as separate fragments
+    def test_iter_html_wide_node(self):
+        parent = ParentNode("ul", [LeafNode("li", str(i)) for i in range(10000)])
+        chunks = list(parent.iter_html())
+        self.assertEqual(len(chunks), 10002)
+        self.assertEqual(chunks[1], "<li>0</li>")
+
 
 if __name__ == "__main__":
     unittest.main()
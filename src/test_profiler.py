@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+
+import profiler
+from utils import markdown_to_html_node
+
+
+class TestProfiler(unittest.TestCase):
+    def tearDown(self):
+        profiler.enable(False)
+
+    def test_disabled_by_default(self):
+        self.assertIs(profiler.stage("anything"), profiler.NO_STAGE)
+
+    def test_records_pipeline_stages_per_page(self):
+        active = profiler.enable()
+        active.start_page("index.html")
+        markdown_to_html_node("# Title\n\nSome **bold** text")
+        timings = active.pages["index.html"]
+        for name in ("markdown_to_blocks", "block_to_block_type", "text_to_textnodes"):
+            self.assertIn(name, timings)
+        self.assertEqual(active.totals()["markdown_to_blocks"]["pages"], 1)
+
+    def test_nested_stages_are_exclusive(self):
+        active = profiler.enable()
+        active.start_page("index.html")
+        with active.stage("outer"):
+            with active.stage("inner"):
+                sum(range(100000))
+        timings = active.pages["index.html"]
+        self.assertLess(timings["outer"], timings["inner"])
+
+    def test_timed(self):
+        active = profiler.enable()
+        active.start_page("index.html")
+        self.assertEqual(list(active.timed(iter([1, 2]), "items")), [1, 2])
+        self.assertIn("items", active.pages["index.html"])
+
+    def test_slowest_and_report(self):
+        active = profiler.enable()
+        active.pages = {"a.html": {"total": 0.5}, "b.html": {"total": 2.0}, "c.html": {"total": 1.0}}
+        self.assertEqual([page for page, _ in active.slowest(2)], ["b.html", "c.html"])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profile.json")
+            active.write_report(path)
+            with open(path) as f:
+                report = json.load(f)
+        self.assertEqual(report["stages"]["total"]["seconds"], 3.5)
+        self.assertEqual(report["pages"]["b.html"], {"total": 2.0})
+
+    def test_take_page(self):
+        active = profiler.enable()
+        active.start_page("a.html")
+        active.add("read", 1.0)
+        self.assertEqual(active.take_page("a.html"), {"read": 1.0})
+        active.add("read", 1.0)
+        self.assertEqual(active.pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
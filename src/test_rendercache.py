@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+import rendercache
+from rendercache import RenderCache
+from utils import BlockType, iter_markdown_html, markdown_to_html_node, scan_blocks
+
+
+class TestRenderCache(unittest.TestCase):
+    def tearDown(self):
+        rendercache.enable(False)
+
+    def test_key_depends_on_type_and_basepath(self):
+        cache = RenderCache()
+        key = cache.key(BlockType.PARAGRAPH, "text", "/")
+        self.assertEqual(key, cache.key(BlockType.PARAGRAPH, "text", "/"))
+        self.assertNotEqual(key, cache.key(BlockType.PARAGRAPH, "text", "/site/"))
+        self.assertNotEqual(key, cache.key(BlockType.HEADING, "text", "/"))
+
+    def test_hits_misses_and_eviction(self):
+        cache = RenderCache(max_bytes=10)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "<p>a</p>")
+        self.assertEqual(cache.get("a"), ("<p>a</p>", (), None))
+        cache.put("b", "<p>b</p>")
+        # Only one fragment fits, the least recently used one goes
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "render-cache.json")
+            cache = RenderCache(path=path)
+            cache.put("a", "<p>a</p>")
+            cache.save()
+            self.assertEqual(RenderCache(path=path).get("a"), ("<p>a</p>", (), None))
+
+    def test_merge_worker_updates(self):
+        worker = RenderCache(track_added=True)
+        worker.get("a")
+        worker.put("a", "<p>a</p>")
+        parent = RenderCache()
+        parent.merge(worker.take_updates())
+        self.assertEqual((parent.hits, parent.misses), (0, 1))
+        self.assertEqual(parent.get("a"), ("<p>a</p>", (), None))
+        self.assertEqual(worker.take_updates(), {"hits": 0, "misses": 0, "added": []})
+
+    def test_repeated_blocks_render_once(self):
+        cache = rendercache.enable()
+        md = "Shared **footer**\n\nFirst\n\nShared **footer**"
+        html = "".join(iter_markdown_html(scan_blocks(md.split("\n"))))
+        self.assertEqual(html, markdown_to_html_node(md).to_html())
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_cached_blocks_keep_their_links(self):
+        rendercache.enable()
+        md = "See [docs](/docs)\n\nSee [docs](/docs)"
+        links = []
+        "".join(iter_markdown_html(scan_blocks(md.split("\n")), "/", links))
+        self.assertEqual(links, ["/docs", "/docs"])
+
+
+if __name__ == "__main__":
+    unittest.main()
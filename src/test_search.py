@@ -0,0 +1,150 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import rendercache
+import search
+from generate import generate_pages_recursive
+from manifest import Manifest
+from search import SearchIndex, add_terms, page_url, shard_file, shard_for, split_shards
+from utils import iter_markdown_html, scan_blocks
+from writer import ChangeList, StreamWriter
+
+
+def markdown_terms(markdown):
+    terms = {}
+    "".join(iter_markdown_html(scan_blocks(markdown.split("\n")), "/", None, terms))
+    return terms
+
+
+class TestTerms(unittest.TestCase):
+    def tearDown(self):
+        rendercache.enable(False)
+
+    def test_add_terms(self):
+        terms = {}
+        add_terms(terms, "The river, the Hill!", 2)
+        self.assertEqual(terms, {"the": 4, "river": 2, "hill": 2})
+
+    def test_headings_are_boosted(self):
+        terms = markdown_terms("# River\n\nA river and `code` and [link text](/url)\n\n```\nfn()\n```")
+        self.assertEqual(terms["river"], 9)
+        self.assertEqual(terms["code"], 1)
+        self.assertEqual(terms["link"], 1)
+        self.assertEqual(terms["fn"], 1)
+        self.assertNotIn("url", terms)
+
+    def test_cached_blocks_keep_their_terms(self):
+        markdown = "## Shared\n\nText\n\n## Shared"
+        expected = markdown_terms(markdown)
+        rendercache.enable()
+        # Entries made without terms get them once they are asked for
+        "".join(iter_markdown_html(scan_blocks(markdown.split("\n"))))
+        self.assertEqual(markdown_terms(markdown), expected)
+        self.assertEqual(markdown_terms(markdown), expected)
+
+    def test_shards_and_url(self):
+        self.assertEqual(shard_for("river", {"", "r", "ri"}), "ri")
+        self.assertEqual(shard_for("rat", {"", "r", "ri"}), "r")
+        self.assertEqual(shard_for("hill", {"r"}), None)
+        self.assertEqual([shard_file(prefix) for prefix in ("", "ri", "é1")], ["terms.json", "terms-ri.json", "terms-_e9_1.json"])
+        self.assertEqual(page_url("docs/blog/tom/index.html", "docs", "/site/"), "/site/blog/tom/")
+        self.assertEqual(page_url("docs/index.html", "docs/", "/"), "/")
+        self.assertEqual(page_url("docs/about.html", "docs", "/"), "/about.html")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.docs = os.path.join(self.tmp, "docs")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def read(self, name):
+        with open(os.path.join(self.docs, "search", name)) as f:
+            return json.load(f)
+
+    def write(self, index):
+        changes = ChangeList()
+        with contextlib.redirect_stdout(io.StringIO()):
+            index.write(self.docs, StreamWriter(known_hashes=index.shard_hashes, changes=changes))
+        return sorted(os.path.basename(path) for path in changes.written), sorted(os.path.basename(path) for path in changes.removed)
+
+    def test_ids_are_stable_and_reused(self):
+        index = SearchIndex()
+        index.add_page("a", "/a", "A", {})
+        index.add_page("b", "/b", "B", {})
+        index.add_page("a", "/a", "A2", {})
+        self.assertEqual(index.pages["a"]["id"], 0)
+        index.retain({"b"})
+        index.add_page("c", "/c", "C", {})
+        self.assertEqual(index.pages["c"]["id"], 0)
+        self.assertEqual(index.pages["b"]["id"], 1)
+
+    def test_small_sites_get_one_shard(self):
+        index = SearchIndex()
+        for number in range(50):
+            index.add_page(f"docs/{number}.html", f"/{number}.html", str(number), {f"word{word}": 1 for word in range(number * 20, number * 20 + 40)})
+        written, _ = self.write(index)
+        self.assertEqual(written, ["index.json", "terms.json"])
+        self.assertEqual(self.read("index.json")["shards"], {"": "terms.json"})
+        self.assertEqual(len(self.read("terms.json")), 1020)
+
+    @mock.patch.object(search, "SHARD_POSTINGS", 2)
+    def test_prefixes_grow_until_shards_fit(self):
+        postings = {term: [[0, 1]] for term in ("a", "ab", "abc", "abd", "b")}
+        shards = split_shards(postings)
+        # "a" and "ab" hold just the term that is their prefix
+        self.assertEqual({prefix: sorted(terms) for prefix, terms in shards.items()}, {"a": ["a"], "ab": ["ab"], "abc": ["abc"], "abd": ["abd"], "b": ["b"]})
+        for term in postings:
+            self.assertIn(term, shards[shard_for(term, shards)])
+
+        postings["abe"] = [[0, 1], [1, 1], [2, 1]]
+        postings["b"] = [[0, 1], [1, 1]]
+        shards = split_shards(postings)
+        # One term can't be split any further
+        self.assertEqual(shards["abe"], {"abe": postings["abe"]})
+        self.assertEqual(shards["b"], {"b": postings["b"]})
+
+    @mock.patch.object(search, "SHARD_POSTINGS", 2)
+    def test_only_changed_shards_are_written(self):
+        # Three postings don't fit in one shard, so terms go by first letter
+        path = os.path.join(self.tmp, "search.json")
+        index = SearchIndex(path)
+        index.add_page("docs/a.html", "/a.html", "A", {"river": 1, "hill": 3})
+        index.add_page("docs/b.html", "/b.html", "B", {"river": 5, "mill": 1})
+        self.assertEqual(self.write(index), (["index.json", "terms-h.json", "terms-m.json", "terms-r.json"], []))
+        self.assertEqual(self.read("terms-r.json"), {"river": [[1, 5], [0, 1]]})
+        self.assertEqual(self.read("index.json"), {"shards": {"h": "terms-h.json", "m": "terms-m.json", "r": "terms-r.json"}, "pages": [["/a.html", "A"], ["/b.html", "B"]]})
+        index.save()
+
+        index = SearchIndex(path)
+        index.add_page("docs/b.html", "/b.html", "B", {"river": 2, "rain": 1, "mill": 1})
+        index.retain({"docs/b.html"})
+        self.assertEqual(self.write(index), (["index.json", "terms-r.json"], ["terms-h.json"]))
+        self.assertEqual(self.read("index.json")["pages"], [None, ["/b.html", "B"]])
+
+    def test_build_indexes_pages_missing_from_the_index(self):
+        content = os.path.join(self.tmp, "content")
+        template = os.path.join(self.tmp, "template.html")
+        os.makedirs(content)
+        for name, text in (("template.html", "{{ Content }}"), ("content/index.md", "# Home\n\nWelcome"), ("content/about.md", "# About")):
+            with open(os.path.join(self.tmp, name), 'w') as f:
+                f.write(text)
+        manifest = Manifest(os.path.join(self.tmp, "manifest.json"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content, template, self.docs, "/", manifest)
+            index = SearchIndex()
+            generate_pages_recursive(content, template, self.docs, "/", manifest, jobs=2, search_index=index)
+        self.assertEqual(sorted(page["url"] for page in index.pages.values()), ["/", "/about.html"])
+        self.assertEqual(index.pages[os.path.join(self.docs, "index.html")]["terms"], {"home": 8, "welcome": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from generate import find_pages, generate_pages_recursive
+from manifest import Manifest
+from shard import assign_shards, merge_manifests, parse_shard, shard_manifest_path
+
+
+class TestShard(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.content = os.path.join(self.tmp, "content")
+        self.docs = os.path.join(self.tmp, "docs")
+        self.template = os.path.join(self.tmp, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for index, size in enumerate([900, 500, 400, 300, 200, 100]):
+            self.write(os.path.join(self.content, f"page{index}.md"), f"# Page {index}\n\n" + "x" * size)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for value in ("0/4", "5/4", "1", "a/b", "1/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(value)
+
+    def test_assignment_is_balanced_and_stable(self):
+        pages = find_pages(self.content, self.docs)
+        shards = assign_shards(pages, 2, self.content)
+        self.assertEqual(shards, assign_shards(list(reversed(pages)), 2, self.content))
+        loads = {1: 0, 2: 0}
+        for from_path, dest_path in pages:
+            loads[shards[dest_path]] += os.path.getsize(from_path)
+        self.assertLess(abs(loads[1] - loads[2]), 200)
+
+    def test_shards_merge_into_complete_manifest(self):
+        manifest_path = os.path.join(self.tmp, "manifest.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for index in (1, 2, 3):
+                manifest = Manifest(shard_manifest_path(manifest_path, index, 3))
+                manifest.shard = [index, 3]
+                generate_pages_recursive(self.content, self.template, self.docs, "/", manifest, shard=(index, 3))
+                manifest.save()
+        pages = find_pages(self.content, self.docs)
+        merged, problems = merge_manifests(manifest_path, 3, pages)
+        self.assertEqual(problems, [])
+        self.assertEqual(sorted(merged.pages), sorted(dest_path for _, dest_path in pages))
+
+        os.remove(shard_manifest_path(manifest_path, 2, 3))
+        _, problems = merge_manifests(manifest_path, 3, pages)
+        self.assertIn("Missing manifest for shard 2/3", problems[0])
+        self.assertTrue(all(problem.startswith("No shard built") for problem in problems[1:]))
+        self.assertGreater(len(problems), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sitemap
+from generate import generate_pages_recursive
+from manifest import Manifest
+from sitemap import SiteMap, section_of, summarize
+from writer import ChangeList, StreamWriter
+
+
+class TestMetadata(unittest.TestCase):
+    def test_summarize(self):
+        self.assertEqual(summarize("Some **bold**\nand [a link](/x) text"), "Some bold and a link text")
+        self.assertIsNone(summarize("[< Back Home](/)"))
+        self.assertIsNone(summarize("![image](/a.png)"))
+        summary = summarize("word " * 100)
+        self.assertLessEqual(len(summary), 281)
+        self.assertTrue(summary.endswith("word…"))
+
+    def test_section_of(self):
+        self.assertEqual(section_of("docs/blog/tom/index.html", "docs"), "blog")
+        self.assertEqual(section_of("docs/blog/notes.html", "docs/"), "blog")
+        self.assertIsNone(section_of("docs/blog/index.html", "docs"))
+        self.assertIsNone(section_of("docs/index.html", "docs"))
+
+
+class TestSiteMap(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.docs = os.path.join(self.tmp, "docs")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def read(self, *parts):
+        with open(os.path.join(self.docs, *parts)) as f:
+            return f.read()
+
+    def write(self, site_map):
+        changes = ChangeList()
+        with contextlib.redirect_stdout(io.StringIO()):
+            site_map.write(self.docs, "https://example.com/", "/site/", StreamWriter(known_hashes=site_map.output_hashes, changes=changes))
+        relative = lambda paths: sorted(os.path.relpath(path, self.docs) for path in paths)
+        return relative(changes.written), relative(changes.removed)
+
+    def add(self, site_map, relative, updated, title="Page", summary=None):
+        url = "/site/" + relative.replace("index.html", "")
+        site_map.add_page(os.path.join(self.docs, relative), url, title, updated, summary)
+
+    def test_sitemap_and_feeds(self):
+        path = os.path.join(self.tmp, "sitemap.json")
+        site_map = SiteMap(path)
+        self.add(site_map, "index.html", 100)
+        self.add(site_map, "blog/index.html", 100, "The Blog")
+        self.add(site_map, "blog/old/index.html", 200, "Old & busted", "First <p>")
+        self.add(site_map, "blog/new/index.html", 300, "New")
+        self.assertEqual(self.write(site_map), ([os.path.join("blog", "feed.xml"), "sitemap.xml"], []))
+        self.assertIn("<url><loc>https://example.com/site/blog/old/</loc><lastmod>1970-01-01T00:03:20Z</lastmod></url>", self.read("sitemap.xml"))
+        feed = self.read("blog", "feed.xml")
+        self.assertIn("<title>The Blog</title>", feed)
+        self.assertIn("<link rel=\"self\" href=\"https://example.com/site/blog/feed.xml\"/>", feed)
+        self.assertIn("<title>Old &amp; busted</title>", feed)
+        self.assertIn("<summary>First &lt;p&gt;</summary>", feed)
+        self.assertLess(feed.index("/site/blog/new/"), feed.index("/site/blog/old/"))
+        self.assertNotIn("<id>https://example.com/site/blog/</id><link", feed)
+        site_map.save()
+
+        # Nothing changed, then the blog is gone
+        site_map = SiteMap(path)
+        self.assertEqual(self.write(site_map), ([], []))
+        site_map.retain({os.path.join(self.docs, "index.html")})
+        self.assertEqual(self.write(site_map), (["sitemap.xml"], [os.path.join("blog", "feed.xml")]))
+
+    def test_large_sitemaps_are_split(self):
+        site_map = SiteMap()
+        for number in range(5):
+            self.add(site_map, f"page{number}.html", number)
+        with mock.patch.object(sitemap, "SITEMAP_LIMIT", 2):
+            self.write(site_map)
+        index = self.read("sitemap.xml")
+        self.assertIn("<sitemapindex", index)
+        self.assertIn("<sitemap><loc>https://example.com/site/sitemap-3.xml</loc><lastmod>1970-01-01T00:00:04Z</lastmod></sitemap>", index)
+        self.assertEqual(self.read("sitemap-3.xml").count("<url>"), 1)
+
+    def test_build_collects_metadata(self):
+        content = os.path.join(self.tmp, "content")
+        template = os.path.join(self.tmp, "template.html")
+        os.makedirs(os.path.join(content, "blog"))
+        for name, text in (("template.html", "{{ Content }}"), ("content/index.md", "# Home\n\n[back](/)\n\nWelcome _here_"), ("content/blog/post.md", "# Post")):
+            with open(os.path.join(self.tmp, name), 'w') as f:
+                f.write(text)
+        manifest = Manifest(os.path.join(self.tmp, "manifest.json"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content, template, self.docs, "/", manifest)
+            site_map = SiteMap()
+            generate_pages_recursive(content, template, self.docs, "/", manifest, jobs=2, site_map=site_map)
+        home = site_map.pages[os.path.join(self.docs, "index.html")]
+        self.assertEqual((home["url"], home["title"], home["summary"]), ("/", "Home", "Welcome here"))
+        self.assertEqual(home["updated"], os.stat(os.path.join(content, "index.md")).st_mtime)
+        self.assertIsNone(site_map.pages[os.path.join(self.docs, "blog", "post.html")]["summary"])
+
+
+if __name__ == "__main__":
+    unittest.main()
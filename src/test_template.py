@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from leafnode import LeafNode
+from parentnode import ParentNode
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_named_placeholders(self):
+        template = Template("<title>{{ Title }}</title>{{Content}}<p>{{ Basepath }}</p>")
+        html = template.render({"Title": "Home", "Content": "<b>hi</b>", "Basepath": "/site/"})
+        self.assertEqual(html, "<title>Home</title><b>hi</b><p>/site/</p>")
+
+    def test_render_node_slot(self):
+        template = Template("<article>{{ Content }}</article>")
+        node = ParentNode("div", [LeafNode("b", "bold")])
+        self.assertEqual(template.render({"Content": node}), "<article><div><b>bold</b></div></article>")
+
+    def test_basepath_only_applies_to_template_markup(self):
+        template = Template('<link href="/index.css"><script src="//cdn.example.com/a.js"></script>{{ Content }}', "/site/")
+        html = template.render({"Content": 'href="/raw"'})
+        self.assertEqual(html, '<link href="/site/index.css"><script src="//cdn.example.com/a.js"></script>href="/raw"')
+
+    def test_missing_value(self):
+        with self.assertRaises(ValueError):
+            Template("{{ Author }}").render({})
+
+    def test_load_template_is_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, 'w') as f:
+                f.write("{{ Title }}")
+            template = load_template(path)
+            self.assertIs(load_template(path), template)
+            self.assertIsNot(load_template(path, "/other/"), template)
+            with open(path, 'w') as f:
+                f.write("<h1>{{ Title }}</h1>")
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(load_template(path).render({"Title": "x"}), "<h1>x</h1>")
+
+    def test_partials(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "partials"))
+            path = os.path.join(tmp, "template.html")
+            header = os.path.join(tmp, "partials", "header.html")
+            with open(path, 'w') as f:
+                f.write("{{> partials/header.html }}{{ Content }}")
+            with open(header, 'w') as f:
+                f.write('<a href="/">{{ Title }}</a>')
+            template = load_template(path, "/site/")
+            self.assertEqual(template.dependencies, [path, header])
+            self.assertEqual(template.render({"Title": "Home", "Content": "!"}), '<a href="/site/">Home</a>!')
+            with open(header, 'w') as f:
+                f.write("<h1>{{ Title }}</h1>")
+            os.utime(header, ns=(0, 0))
+            self.assertEqual(load_template(path, "/site/").render({"Title": "Home", "Content": "!"}), "<h1>Home</h1>!")
+
+    def test_recursive_partial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, 'w') as f:
+                f.write("{{> template.html }}")
+            with self.assertRaises(ValueError):
+                load_template(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
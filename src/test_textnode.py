@@ -20,6 +20,9 @@ class TestTextNode(unittest.TestCase):
         node = TextNode("This is a node", TextType.ITALIC)
         node2 = TextNode("This is a node", TextType.TEXT)
         self.assertNotEqual(node, node2)
+    def test_slots(self):
+        node = TextNode("This is a node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
 
 
 if __name__ == "__main__":
@@ -1,7 +1,8 @@
 import unittest
 
 from textnode import TextNode, TextType
-from utils import text_node_to_html_node, split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node
+from utils import text_node_to_html_node, split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node, iter_blocks, iter_markdown_html, scan_blocks, scan_block
+import io
 
 class TestTextNode(unittest.TestCase):
     def test_text(self):
@@ -16,6 +17,11 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(html_node.value, "")
         self.assertEqual(html_node.props["src"], "www.imageurl.com")
         self.assertEqual(html_node.props["alt"], "This is a image node")
+    def test_link_basepath(self):
+        node = TextNode("link", TextType.LINK, "/blog/tom")
+        self.assertEqual(text_node_to_html_node(node, "/site/").props["href"], "/site/blog/tom")
+        node = TextNode("link", TextType.LINK, "https://example.com/")
+        self.assertEqual(text_node_to_html_node(node, "/site/").props["href"], "https://example.com/")
 
 class TestSplitNodesDelimiter(unittest.TestCase):
     
@@ -121,6 +127,16 @@ class TestSplitNodesLink(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0], TextNode("link", TextType.LINK, "https://i.imgur.com/zjjcJKZ.png"))
 
+    def test_split_node_links_skips_images_and_other_nodes(self):
+        code = TextNode("[not](a link)", TextType.CODE)
+        node = TextNode("![image](a.png) and [link](b)", TextType.TEXT)
+        result = split_nodes_link([code, node])
+        self.assertEqual(result, [
+            code,
+            TextNode("![image](a.png) and ", TextType.TEXT),
+            TextNode("link", TextType.LINK, "b"),
+        ])
+
 class TestTextToTextNodes(unittest.TestCase):
     def test_split_all(self):
         text = "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
@@ -138,6 +154,57 @@ class TestTextToTextNodes(unittest.TestCase):
             TextNode("link", TextType.LINK, "https://boot.dev"),
         ])
 
+    def test_many_spans(self):
+        # Far more spans than the recursion limit allows for
+        result = text_to_textnodes("**b** and " * 5000)
+        self.assertEqual(len(result), 10000)
+        self.assertEqual(result[-2], TextNode("b", TextType.BOLD))
+        self.assertEqual(result[-1], TextNode(" and ", TextType.TEXT))
+
+    def test_brackets_without_url_are_text(self):
+        result = text_to_textnodes("a [b] c ![d] e")
+        self.assertEqual(result, [TextNode("a [b] c ![d] e", TextType.TEXT)])
+
+    def test_underscore_inside_link_url(self):
+        result = text_to_textnodes("see [docs](https://example.com/a_b_c)")
+        self.assertEqual(result, [
+            TextNode("see ", TextType.TEXT),
+            TextNode("docs", TextType.LINK, "https://example.com/a_b_c"),
+        ])
+
+    def test_link_syntax_inside_code_is_not_a_link(self):
+        result = text_to_textnodes("`[a](b)` then [c](d)")
+        self.assertEqual(result, [
+            TextNode("[a](b)", TextType.CODE),
+            TextNode(" then ", TextType.TEXT),
+            TextNode("c", TextType.LINK, "d"),
+        ])
+        result = text_to_textnodes("`x [a](b` y)")
+        self.assertEqual(result, [TextNode("x [a](b", TextType.CODE), TextNode(" y)", TextType.TEXT)])
+
+    def test_link_inside_bold(self):
+        result = text_to_textnodes("read **[the docs](/docs)** first")
+        self.assertEqual(result, [
+            TextNode("read ", TextType.TEXT),
+            TextNode("[the docs](/docs)", TextType.BOLD, None, [TextNode("the docs", TextType.LINK, "/docs")]),
+            TextNode(" first", TextType.TEXT),
+        ])
+
+    def test_link_and_image_inside_italic(self):
+        result = text_to_textnodes("_see [a](b) and ![c](d.png)_")
+        self.assertEqual(result, [
+            TextNode("see [a](b) and ![c](d.png)", TextType.ITALIC, None, [
+                TextNode("see ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "b"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("c", TextType.IMAGE, "d.png"),
+            ]),
+        ])
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(Exception):
+            text_to_textnodes("This is **not closed")
+
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
         md = """
@@ -159,6 +226,28 @@ This is the same paragraph on a new line
             ],
         )
 
+class TestIterBlocks(unittest.TestCase):
+    def test_iter_blocks_from_file(self):
+        md = io.StringIO("# Title\n\nSome text\nmore text\n\n```\ncode\n\nstill code\n```\n- a\n- b\n")
+        self.assertEqual(list(iter_blocks(md)), [
+            (BlockType.HEADING, "# Title"),
+            (BlockType.PARAGRAPH, "Some text\nmore text"),
+            (BlockType.CODE, "```\ncode\n\nstill code\n```"),
+            (BlockType.UNORDERED_LIST, "- a\n- b"),
+        ])
+
+    def test_iter_blocks_is_lazy(self):
+        def lines():
+            yield "first block"
+            yield ""
+            raise AssertionError("read too far")
+        self.assertEqual(next(iter_blocks(lines())), (BlockType.PARAGRAPH, "first block"))
+
+    def test_iter_markdown_html_matches_tree(self):
+        md = "# Title\n\nSome **bold** text\n\n> a quote\n\n1. one\n2. two"
+        streamed = "".join(iter_markdown_html(scan_blocks(md.split("\n"))))
+        self.assertEqual(streamed, markdown_to_html_node(md).to_html())
+
 class TestBlockToBlockType(unittest.TestCase):
     def test_block_to_block_type_heading(self):
         block = "# Test"
@@ -175,6 +264,20 @@ class TestBlockToBlockType(unittest.TestCase):
             BlockType.PARAGRAPH,
         )
 
+    def test_scan_block_lists_and_quotes(self):
+        self.assertEqual(scan_block("- a\n- b "), (BlockType.UNORDERED_LIST, ["a", "b"]))
+        self.assertEqual(scan_block("> a\n>b\n>"), (BlockType.QUOTE, ["a", "b", ""]))
+        self.assertEqual(scan_block("1. a\n3. b"), (BlockType.PARAGRAPH, None))
+        self.assertEqual(scan_block("- a\nb"), (BlockType.PARAGRAPH, None))
+        self.assertEqual(scan_block("```\ncode\n```"), (BlockType.CODE, None))
+
+    def test_scan_block_long_ordered_list(self):
+        block = "\n".join(f"{i}. item {i}" for i in range(1, 10001))
+        block_type, items = scan_block(block)
+        self.assertEqual(block_type, BlockType.ORDERED_LIST)
+        self.assertEqual(items[9], "item 10")
+        self.assertEqual(len(items), 10000)
+
 class TestMarkDownToHTMLNode(unittest.TestCase):
     def test_paragraphs(self):
         md = """
@@ -208,5 +311,19 @@ class TestMarkDownToHTMLNode(unittest.TestCase):
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_links_inside_bold_and_italic(self):
+        md = "**[the docs](/docs)** and _more [here](/more)_"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, "<div><p><b><a href=\"/docs\">the docs</a></b> and <i>more <a href=\"/more\">here</a></i></p></div>")
+        links = []
+        streamed = "".join(iter_markdown_html(scan_blocks(md.split("\n")), "/", links))
+        self.assertEqual(streamed, html)
+        self.assertEqual(links, ["/docs", "/more"])
+
+    def test_ordered_list_past_nine_items(self):
+        md = "\n".join(f"{i}. item" for i in range(1, 12))
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html.count("<li>"), 11)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,125 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import watch
+from watch import InotifyWaiter, PollWaiter, Watcher, change_waiter, changed_files, snapshot
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.content = os.path.join(self.tmp, "content")
+        self.static = os.path.join(self.tmp, "static")
+        self.docs = os.path.join(self.tmp, "docs")
+        self.template = os.path.join(self.tmp, "template.html")
+        self.write(self.template, "{{ Title }}|{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.watcher = Watcher(self.content, self.static, self.template, self.docs)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.watcher.build()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, *parts):
+        with open(os.path.join(self.docs, *parts)) as f:
+            return f.read()
+
+    def rebuild(self, changed, removed=()):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.watcher.rebuild(list(changed), list(removed))
+        return out.getvalue()
+
+    def test_changed_files(self):
+        old = {"a": (1, 1), "b": (1, 1)}
+        new = {"a": (2, 1), "c": (1, 1)}
+        self.assertEqual(changed_files(old, new), (["a", "c"], ["b"]))
+
+    def test_snapshot(self):
+        files = snapshot([self.content, self.template])
+        self.assertEqual(sorted(files), sorted([
+            os.path.join(self.content, "index.md"),
+            os.path.join(self.content, "blog", "index.md"),
+            self.template,
+        ]))
+
+    def test_rebuilds_only_changed_page(self):
+        page = os.path.join(self.content, "blog", "index.md")
+        self.write(page, "# News")
+        out = self.rebuild([page])
+        self.assertEqual(out.count("Generating page"), 1)
+        self.assertTrue(self.read("blog", "index.html").startswith("News|"))
+
+    def test_template_change_rebuilds_all_pages(self):
+        self.write(self.template, "<h2>{{ Title }}</h2>")
+        self.rebuild([self.template])
+        self.assertEqual(self.read("index.html"), "<h2>Home</h2>\n")
+        self.assertEqual(self.read("blog", "index.html"), "<h2>Blog</h2>\n")
+
+    def test_partial_change_rebuilds_all_pages(self):
+        partial = os.path.join(self.tmp, "footer.html")
+        self.write(partial, "one")
+        self.write(self.template, "{{ Title }}{{> footer.html }}")
+        self.rebuild([self.template])
+        self.write(partial, "two")
+        self.rebuild([partial])
+        self.assertEqual(self.read("blog", "index.html"), "Blogtwo\n")
+
+    def test_static_changes(self):
+        css = os.path.join(self.static, "index.css")
+        self.write(css, "body { color: red }")
+        self.rebuild([css])
+        self.assertEqual(self.read("index.css"), "body { color: red }")
+        os.remove(css)
+        self.rebuild([], [css])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+
+
+class TestWaiters(unittest.TestCase):
+    def test_polling_backs_off_until_something_changes(self):
+        waiter = PollWaiter(0.05, 0.3)
+        delays = []
+        with mock.patch.object(watch.time, "sleep", delays.append):
+            for _ in range(5):
+                waiter.wait()
+                waiter.idle()
+            waiter.changed()
+            waiter.wait()
+        self.assertEqual(delays, [0.05, 0.1, 0.2, 0.3, 0.3, 0.05])
+
+    def test_poll_option(self):
+        self.assertIsInstance(change_waiter(0.05, 1, poll=True), PollWaiter)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_inotify_reports_changes_in_new_directories(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            waiter = InotifyWaiter(0.01)
+            try:
+                waiter.watch([tmp])
+                self.assertFalse(waiter.wait_for_events(0))
+                os.makedirs(os.path.join(tmp, "blog"))
+                self.assertTrue(waiter.wait_for_events(1))
+                waiter.watch([tmp])
+                with open(os.path.join(tmp, "blog", "post.md"), 'w') as f:
+                    f.write("# Post")
+                waiter.wait()
+                self.assertFalse(waiter.wait_for_events(0))
+            finally:
+                waiter.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from writer import BufferWriter, ChangeList, StreamWriter, ThreadedWriter
+
+
+class TestWriter(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_stream_writer_creates_directories(self):
+        path = os.path.join(self.tmp, "a", "b", "index.html")
+        digest = StreamWriter().write(path, iter(["<p>", "hi", "</p>"]))
+        self.assertEqual(self.read(path), "<p>hi</p>")
+        self.assertEqual(digest, hashlib.sha256(b"<p>hi</p>").hexdigest())
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["index.html"])
+
+    def test_stream_writer_recreates_removed_directory(self):
+        writer = StreamWriter()
+        path = os.path.join(self.tmp, "a", "index.html")
+        writer.write(path, ["one"])
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+        writer.write(path, ["two"])
+        self.assertEqual(self.read(path), "two")
+
+    def test_failed_render_keeps_old_page(self):
+        path = os.path.join(self.tmp, "index.html")
+        writer = StreamWriter()
+        writer.write(path, ["old"])
+
+        def chunks():
+            yield "new"
+            raise ValueError("broken")
+        with self.assertRaises(ValueError):
+            writer.write(path, chunks())
+        self.assertEqual(self.read(path), "old")
+        # The half written temporary file is gone too
+        self.assertEqual(os.listdir(self.tmp), ["index.html"])
+
+    def test_buffer_writer(self):
+        writer = BufferWriter()
+        digest = writer.write("docs/index.html", ["a", "b"])
+        self.assertEqual(digest, hashlib.sha256(b"ab").hexdigest())
+        self.assertEqual(writer.take("docs/index.html"), b"ab")
+        self.assertIsNone(writer.take("docs/index.html"))
+
+    def test_known_hashes_skip_unchanged_pages(self):
+        path = os.path.join(self.tmp, "index.html")
+        digest = StreamWriter().write(path, ["same"])
+        mtime = os.stat(path).st_mtime_ns
+        changes = ChangeList()
+        writer = StreamWriter(known_hashes={path: digest}, changes=changes)
+        self.assertEqual(writer.write(path, ["sa", "me"]), digest)
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+        self.assertEqual(os.listdir(self.tmp), ["index.html"])
+        writer.write(path, ["different"])
+        self.assertEqual(self.read(path), "different")
+        self.assertEqual(changes.written, {path})
+
+    def test_known_hash_of_missing_file_is_written(self):
+        path = os.path.join(self.tmp, "index.html")
+        digest = hashlib.sha256(b"page").hexdigest()
+        writer = StreamWriter(known_hashes={path: digest})
+        writer.submit(path, b"page", digest)
+        self.assertEqual(self.read(path), "page")
+
+    def test_threaded_writer_skips_unchanged(self):
+        first = os.path.join(self.tmp, "x", "first.html")
+        second = os.path.join(self.tmp, "y", "second.html")
+        known = {first: StreamWriter().write(first, ["same"])}
+        mtime = os.stat(first).st_mtime_ns
+        changes = ChangeList()
+        writer = ThreadedWriter(known_hashes=known, changes=changes)
+        writer.write(first, ["same"])
+        writer.write(second, ["before"])
+        writer.flush()
+        writer.submit(second, b"after", hashlib.sha256(b"after").hexdigest())
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            writer.close()
+        self.assertEqual(os.stat(first).st_mtime_ns, mtime)
+        self.assertEqual(self.read(second), "after")
+        self.assertEqual(out.getvalue(), "Wrote 2 pages, 1 unchanged\n")
+        self.assertEqual(changes.written, {second})
+
+    def test_threaded_writer_reports_errors(self):
+        blocker = os.path.join(self.tmp, "file")
+        with open(blocker, 'w') as f:
+            f.write("")
+        writer = ThreadedWriter()
+        writer.write(os.path.join(blocker, "index.html"), ["x"])
+        with self.assertRaises(Exception):
+            writer.flush()
+
+    def test_change_list(self):
+        changes = ChangeList()
+        docs = os.path.join(self.tmp, "docs")
+        changes.add_written(os.path.join(docs, "b", "index.html"))
+        changes.add_written(os.path.join(docs, "a.css"))
+        changes.add_removed(os.path.join(docs, "old.html"))
+        changes.add_written(os.path.join(docs, "old.html"))
+        path = os.path.join(self.tmp, "cache", "changed.json")
+        changes.save(path, docs)
+        with open(path) as f:
+            self.assertEqual(json.load(f), {"written": ["a.css", "b/index.html", "old.html"], "removed": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,11 +9,18 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
-    def __init__(self, text, text_type, url=None):
+    __slots__ = ("text", "text_type", "url", "children")
+
+    # children holds the images and links inside a bold or italic span, as
+    # TEXT, IMAGE and LINK nodes; it is None when there are none
+    def __init__(self, text, text_type, url=None, children=None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        self.children = children
     def __eq__(self, target):
-        return (self.text == target.text and self.text_type == target.text_type and self.url == target.url)
+        return (self.text == target.text and self.text_type == target.text_type and self.url == target.url and self.children == target.children)
     def __repr__(self):
+        if self.children is not None:
+            return f"TextNode({self.text}, {self.text_type.value}, {self.url}, {self.children})"
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
\ No newline at end of file
@@ -1,18 +1,25 @@
 from textnode import TextNode, TextType
 from leafnode import LeafNode
-from extract import extract_markdown_images, extract_markdown_links
+from extract import DELIMITER_PATTERN, scan_images_and_links
 from enum import Enum
 import re
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, EMPTY_PROPS
+import features
 
-def text_node_to_html_node(text_node):
+def rebase_url(url, basepath):
+    # Root-relative URLs are moved under the site's basepath
+    if url.startswith("/") and not url.startswith("//"):
+        return basepath + url[1:]
+    return url
+
+def text_node_to_html_node(text_node, basepath="/"):
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
         case TextType.BOLD:
-            return LeafNode("b", text_node.text)
+            return emphasis_node("b", text_node, basepath)
         case TextType.ITALIC:
-            return LeafNode("i", text_node.text)
+            return emphasis_node("i", text_node, basepath)
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
@@ -20,16 +27,35 @@ def text_node_to_html_node(text_node):
                 raise ValueError("Text is required")
             if text_node.url is None:
                 raise ValueError("URL is required")
-            return LeafNode("a", text_node.text, { "href": text_node.url})
+            url = text_node.url
+            asset_map = features.asset_map()
+            if asset_map is not None:
+                url = asset_map.rewrite(url)
+            return LeafNode("a", text_node.text, { "href": rebase_url(url, basepath)})
         case TextType.IMAGE:
             if text_node.url is None:
                 raise ValueError("URL is required")
             if text_node.text is None:
                 raise ValueError("Alt text is highly recommended")
-            return LeafNode("img", "", { "src": text_node.url, "alt": text_node.text })
+            asset_map = features.asset_map()
+            if asset_map is None:
+                return LeafNode("img", "", { "src": rebase_url(text_node.url, basepath), "alt": text_node.text })
+            # Static images get their fingerprinted URL and their size
+            props = { "src": rebase_url(asset_map.rewrite(text_node.url), basepath), "alt": text_node.text }
+            asset = asset_map.lookup(text_node.url)
+            if asset is not None and "width" in asset:
+                props["width"] = str(asset["width"])
+                props["height"] = str(asset["height"])
+            return LeafNode("img", "", props)
         case _:
             raise Exception("No such text type")
 
+def emphasis_node(tag, text_node, basepath):
+    if text_node.children is None:
+        return LeafNode(tag, text_node.text)
+    children = [text_node_to_html_node(child, basepath) for child in text_node.children]
+    return HTMLNode(tag, None, children, EMPTY_PROPS)
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     result = []
     
@@ -44,108 +70,157 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return result
 
 def split_nodes_image(old_nodes):
-    result = []
-
-    for node in old_nodes:
-        images = extract_markdown_images(node.text)
-        curr_text = node.text
-        if len(images) > 0:
-            for image in images:
-                split = curr_text.split(f"![{image[0]}]({image[1]})", 1)
-                if split[0] != "":
-                    result.append(TextNode(f"{split[0]}",TextType.TEXT))
-                result.append(TextNode(image[0], TextType.IMAGE, image[1]))
-                curr_text = split[1]
-            if curr_text != "":
-                result.append(TextNode(curr_text, TextType.TEXT))
-        else:
-            result.append(node)
-    return result
+    return split_nodes_spans(old_nodes, True)
 
 def split_nodes_link(old_nodes):
+    return split_nodes_spans(old_nodes, False)
+
+def split_nodes_spans(old_nodes, images):
+    # Splits the images (or links) out of every TEXT node, using the
+    # positions found by the scanner. Other nodes are passed through.
     result = []
 
     for node in old_nodes:
-        links = extract_markdown_links(node.text)
-        curr_text = node.text
-        if len(links) > 0:
-            for link in links:
-                split = curr_text.split(f"[{link[0]}]({link[1]})", 1)
-                if split[0] != "":
-                    result.append(TextNode(f"{split[0]}",TextType.TEXT))
-                result.append(TextNode(link[0], TextType.LINK, link[1]))
-                curr_text = split[1]
-            if curr_text != "":
-                result.append(TextNode(curr_text, TextType.TEXT))
-        else:
+        if node.text_type != TextType.TEXT:
             result.append(node)
+            continue
+        text = node.text
+        curr = 0
+        for start, end, is_image, span_text, url in scan_images_and_links(text):
+            if is_image != images:
+                continue
+            if start > curr:
+                result.append(TextNode(text[curr:start], TextType.TEXT))
+            result.append(TextNode(span_text, TextType.IMAGE if images else TextType.LINK, url))
+            curr = end
+        if curr == 0:
+            result.append(node)
+        elif curr < len(text):
+            result.append(TextNode(text[curr:], TextType.TEXT))
     return result
 
 def process_text_node(node, delimiter, text_type):
-    # Base case: no delimiter found
-    text = node.text
-    start_index = text.find(delimiter)
-    
-    if start_index == -1:
-        return [node]  # Return the node unchanged
-        
-    # Find closing delimiter
-    end_index = text.find(delimiter, start_index + len(delimiter))
-    
-    if end_index == -1:
-        raise Exception(f"No closing delimiter found for {delimiter}")
-    
-    # Split into three parts
-    before_text = text[:start_index]
-    delimited_text = text[start_index + len(delimiter):end_index]
-    after_text = text[end_index + len(delimiter):]
-    
     result = []
-    
-    # Add the text before the delimiter
-    if before_text:
-        result.append(TextNode(before_text, TextType.TEXT))
-    
-    # Add the delimited text with the specified type
-    result.append(TextNode(delimited_text, text_type))
-    
-    # Process any remaining text recursively
-    if after_text:
-        after_node = TextNode(after_text, TextType.TEXT)
-        result.extend(process_text_node(after_node, delimiter, text_type))
-    
-    return result
+    text = node.text
+
+    # Walk the text left to right instead of recursing on the remainder, so
+    # a paragraph with thousands of spans doesn't hit the recursion limit
+    while True:
+        start_index = text.find(delimiter)
+
+        # No (more) delimiters: keep what is left as plain text
+        if start_index == -1:
+            if not result:
+                return [node]  # Return the node unchanged
+            if text:
+                result.append(TextNode(text, TextType.TEXT))
+            return result
+
+        # Find closing delimiter
+        end_index = text.find(delimiter, start_index + len(delimiter))
+
+        if end_index == -1:
+            raise Exception(f"No closing delimiter found for {delimiter}")
+
+        # Add the text before the delimiter
+        before_text = text[:start_index]
+        if before_text:
+            result.append(TextNode(before_text, TextType.TEXT))
+
+        # Add the delimited text with the specified type
+        result.append(TextNode(text[start_index + len(delimiter):end_index], text_type))
+
+        text = text[end_index + len(delimiter):]
+
+def split_images_and_links(text):
+    # TEXT, IMAGE and LINK nodes for text, or None when it has neither
+    nodes = []
+    curr = 0
+    for start, end, is_image, span_text, url in scan_images_and_links(text):
+        if start > curr:
+            nodes.append(TextNode(text[curr:start], TextType.TEXT))
+        nodes.append(TextNode(span_text, TextType.IMAGE if is_image else TextType.LINK, url))
+        curr = end
+    if curr == 0:
+        return None
+    if curr < len(text):
+        nodes.append(TextNode(text[curr:], TextType.TEXT))
+    return nodes
+
+# Delimited spans recognised by text_to_textnodes. Images and links inside
+# bold and italic spans become the span's children, code is taken as-is.
+INLINE_DELIMITERS = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
 
 def text_to_textnodes(text):
-    # Start with a single text node
-    nodes = [TextNode(text, TextType.TEXT)]
-    
-    # Apply each splitting function in sequence
-    # First, split by delimiters for bold, italic, and code
-    # Then handle special cases like images and links
-    bold_split = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    italic_split = split_nodes_delimiter(bold_split, "_", TextType.ITALIC)
-    code_split = split_nodes_delimiter(italic_split, "`", TextType.CODE)
-    image_split = split_nodes_image(code_split)
-    link_split = split_nodes_link(image_split)
-    
-    # Return the final list of nodes
-    return link_split
+    # Single left-to-right scan: jump to the next character that may start
+    # a span, emit it and continue after it. Runs in linear time and builds
+    # the node list once, rather than one pass per kind of span. Images and
+    # links come from the same scanner the extract helpers use.
+    nodes = []
+    text_start = 0
+    pos = 0
+    spans = scan_images_and_links(text)
+    span = next(spans, None)
+    token = DELIMITER_PATTERN.search(text)
+    while True:
+        if span is not None and span[0] < pos:
+            # It started inside a delimited span, look again from the end of that
+            spans = scan_images_and_links(text, pos)
+            span = next(spans, None)
+        if token is not None and token.start() < pos:
+            token = DELIMITER_PATTERN.search(text, pos)
+        if span is not None and (token is None or span[0] < token.start()):
+            index, end, is_image, span_text, url = span
+            node = TextNode(span_text, TextType.IMAGE if is_image else TextType.LINK, url)
+            span = next(spans, None)
+        elif token is not None:
+            index = token.start()
+            marker = token.group()
+            end_index = text.find(marker, index + len(marker))
+            if end_index == -1:
+                raise Exception(f"No closing delimiter found for {marker}")
+            content = text[index + len(marker):end_index]
+            text_type = INLINE_DELIMITERS[marker]
+            children = None
+            if text_type != TextType.CODE and "](" in content:
+                children = split_images_and_links(content)
+            node = TextNode(content, text_type, None, children)
+            end = end_index + len(marker)
+        else:
+            break
+        if index > text_start:
+            nodes.append(TextNode(text[text_start:index], TextType.TEXT))
+        nodes.append(node)
+        text_start = pos = end
+
+    if text_start < len(text) or not nodes:
+        nodes.append(TextNode(text[text_start:], TextType.TEXT))
+    return nodes
 
 def markdown_to_blocks(markdown):
-    lines = markdown.split("\n")
-    blocks = []
+    return list(split_blocks(markdown.split("\n")))
+
+def split_blocks(lines):
+    # Yields the blocks of a document one at a time. lines can be any
+    # iterable of lines, including an open file, so a document never has to
+    # be loaded in full.
     current_block = []
     in_code_block = False
     
     for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
         # Check if this line is a code block delimiter
         if line.strip().startswith("```"):
             # If we're starting a code block
             if not in_code_block:
                 # If we have content in current_block, add it as a block
                 if current_block:
-                    blocks.append("\n".join(current_block))
+                    yield "\n".join(current_block)
                     current_block = []
                 # Start a new code block
                 current_block.append(line)
@@ -155,7 +230,7 @@ def markdown_to_blocks(markdown):
                 # Add the closing delimiter to the current block
                 current_block.append(line)
                 # Add the complete code block
-                blocks.append("\n".join(current_block))
+                yield "\n".join(current_block)
                 current_block = []
                 in_code_block = False
         # If we're inside a code block, add the line as is
@@ -164,7 +239,7 @@ def markdown_to_blocks(markdown):
         # If line is empty and we're not in a code block
         elif not line.strip() and current_block and not in_code_block:
             # Add the completed block
-            blocks.append("\n".join(current_block))
+            yield "\n".join(current_block)
             current_block = []
         # If it's a non-empty line and we're not in a code block
         elif line.strip() and not in_code_block:
@@ -172,12 +247,7 @@ def markdown_to_blocks(markdown):
     
     # Don't forget to add the last block if it exists
     if current_block:
-        blocks.append("\n".join(current_block))
-    
-    # Clean the blocks - remove any that are just whitespace
-    blocks = [block for block in blocks if block.strip()]
-    
-    return blocks
+        yield "\n".join(current_block)
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -187,148 +257,204 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
 
+HEADING_PATTERN = re.compile(r"#{1,6} ")
+
 def block_to_block_type(block):
-    lines = block.split('\n')
-    
-    if len(lines) == 1 and re.match(r"^#{1,6} ", lines[0]):
-        return BlockType.HEADING
-    elif block.strip().startswith("```") and block.strip().endswith("```"):
-        return BlockType.CODE
-    elif all(line.startswith(">") and line != "" for line in lines):
-        return BlockType.QUOTE
-    elif all(line.startswith("- ") and line != "" for line in lines):
-        return BlockType.UNORDERED_LIST
-    elif all(line.startswith(f"{index}. ") and line != "" for index, line in enumerate(lines, 1)):
-        return BlockType.ORDERED_LIST
-    else:
-        return BlockType.PARAGRAPH
-
-def text_to_children(block):
-    text_nodes = text_to_textnodes(block)
+    return scan_block(block)[0]
+
+def scan_block(block):
+    # Classifies a block and pulls out its items in one pass over its lines.
+    # Returns (BlockType, items), where items holds the text of each quote
+    # line or list item and is None for every other block type. The first
+    # line decides which kind of block it can be, the others only confirm it.
+    if "\n" not in block and HEADING_PATTERN.match(block):
+        return BlockType.HEADING, None
+    stripped = block.strip()
+    if stripped.startswith("```") and stripped.endswith("```"):
+        return BlockType.CODE, None
+
+    lines = block.split("\n")
+    items = []
+    if lines[0].startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH, None
+            items.append(line[1:].strip())
+        return BlockType.QUOTE, items
+    if lines[0].startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH, None
+            items.append(line[2:].strip())
+        return BlockType.UNORDERED_LIST, items
+    if lines[0].startswith("1. "):
+        for number, line in enumerate(lines, 1):
+            marker_end = line.find(". ")
+            if marker_end == -1 or line[:marker_end] != str(number):
+                return BlockType.PARAGRAPH, None
+            items.append(line[marker_end + 2:].strip())
+        return BlockType.ORDERED_LIST, items
+    return BlockType.PARAGRAPH, None
+
+def text_to_children(block, basepath="/", links=None, terms=None, weight=1):
+    # links, when given, collects the link and image targets as written, and
+    # terms the weight of every word for the search index
+    with features.stage("text_to_textnodes"):
+        text_nodes = text_to_textnodes(block)
+    if terms is not None:
+        from search import add_terms
     html_nodes = []
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        html_node = text_node_to_html_node(text_node, basepath)
         html_nodes.append(html_node)
+        for node in text_node.children or (text_node,):
+            if links is not None and node.url is not None:
+                links.append(node.url)
+            if terms is not None:
+                add_terms(terms, node.text, weight)
     return html_nodes
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    parent_node = HTMLNode("div", None, [], {})
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == BlockType.PARAGRAPH:
-            # Process the text inside the paragraph for inline markdown
-            # This would convert things like **bold** to <b>bold</b>
-            normalized_text = re.sub(r'\s+', ' ', block.strip())
-            children = text_to_children(normalized_text)
-            
-            # Create the paragraph node with the processed children
-            paragraph_node = HTMLNode("p", None, children, {})
-            
-            # Add the paragraph node as a child to the parent div
-            parent_node.children.append(paragraph_node)
-        elif block_type == BlockType.HEADING:
-            # Count the leading # characters to determine heading level
-            heading_level = 0
-            for char in block:
-                if char == '#':
-                    heading_level += 1
-                else:
-                    break
-            
-            # Extract the heading text (removing the leading # and space)
-            heading_text = block[heading_level:].strip()
-            
-            # Convert heading text to HTML nodes
-            heading_children = text_to_children(heading_text)
-            
-            # Create the heading node
-            heading_node = HTMLNode(f"h{heading_level}", None, heading_children, {})
-            
-            # Add the heading node to the parent
-            parent_node.children.append(heading_node)
-        elif block_type == BlockType.CODE:
-            # Extract content between the triple backticks
-            lines = block.strip().split("\n")
-            
-            # Remove the opening and closing ```
-            content_lines = lines[1:-1]  
-            
-            # Join the content lines and add a trailing newline
-            content = "\n".join(line.lstrip() for line in content_lines) + "\n"
-            
-            # Create a text node (no inline parsing)
-            text_node = TextNode(content, TextType.TEXT)
-            
-            # Create the code node
-            code_node = HTMLNode("code", None, [text_node_to_html_node(text_node)], {})
-            
-            # Wrap in a pre tag
-            pre_node = HTMLNode("pre", None, [code_node], {})
-            parent_node.children.append(pre_node)
-        elif block_type == BlockType.QUOTE:
-            # Remove the '>' prefix from each line and join them
-            lines = block.split('\n')
-            quote_content = ""
-            for line in lines:
-                if line.startswith('>'):
-                    # Strip the '>' and any leading space
-                    content = line[1:].strip()
-                    quote_content += content + " "  # Add space between lines
-            
-            # Process the quote content for inline markdown
-            quote_children = text_to_children(quote_content.strip())
-            
-            # Create blockquote node
-            quote_node = HTMLNode("blockquote", None, quote_children, {})
-            
-            # Add to parent
-            parent_node.children.append(quote_node)
-        elif block_type == BlockType.ORDERED_LIST:
-            lines = block.split('\n')
-            list_node = HTMLNode("ol", None, [], {})
-            
-            for line in lines:
-                stripped_line = line.strip()
-                # Check if line starts with a digit followed by a period
-                if stripped_line and any(stripped_line.startswith(f"{i}.") for i in range(10)):
-                    # Find the position of the period to extract content after it
-                    period_pos = stripped_line.find('.')
-                    if period_pos != -1:
-                        # Extract content after the period
-                        content = stripped_line[period_pos + 1:].strip()
-                        
-                        # Process inline markdown in the list item
-                        item_children = text_to_children(content)
-                        
-                        # Create list item node
-                        item_node = HTMLNode("li", None, item_children, {})
-                        
-                        # Add list item to the ordered list
-                        list_node.children.append(item_node)
-            
-            # Add the ordered list to the parent
-            parent_node.children.append(list_node)
-        elif block_type == BlockType.UNORDERED_LIST:
-            lines = block.split('\n')
-            list_node = HTMLNode("ul", None, [], {})  # Changed to ul for unordered list
-            
-            for line in lines:
-                # Check if line is an unordered list item (starts with -, *, or +)
-                stripped_line = line.strip()
-                if stripped_line and stripped_line.startswith(("-", "*", "+")):
-                    # Extract content after the marker
-                    content = stripped_line[1:].strip()  # Remove the marker and whitespace
-                    
-                    # Process inline markdown in the list item
-                    item_children = text_to_children(content)
-                    
-                    # Create list item node
-                    item_node = HTMLNode("li", None, item_children, {})
-                    
-                    # Add list item to the unordered list
-                    list_node.children.append(item_node)
+def iter_blocks(lines):
+    # Lazily yields (BlockType, block) for each block of a document
+    for block_type, block, _ in scan_blocks(lines):
+        yield block_type, block
+
+def scan_blocks(lines):
+    # Like iter_blocks, but also yields the items found by scan_block so the
+    # renderer doesn't have to split the block again
+    for block in split_blocks(lines):
+        with features.stage("block_to_block_type"):
+            block_type, items = scan_block(block)
+        yield block_type, block, items
+
+def markdown_to_html_node(markdown, basepath="/"):
+    parent_node = HTMLNode("div", None, [], EMPTY_PROPS)
+    blocks = scan_blocks(markdown.split("\n"))
+    for block_type, block, items in features.timed(blocks, "markdown_to_blocks"):
+        parent_node.children.append(block_to_html_node(block_type, block, basepath, items))
+    return parent_node
+
+def iter_markdown_html(blocks, basepath="/", links=None, terms=None):
+    # Streaming counterpart of markdown_to_html_node(...).iter_html(): each
+    # block from scan_blocks is rendered and serialized as it comes in
+    yield "<div>"
+    cache = features.render_cache()
+    if terms is not None:
+        from search import merge_terms
+    for block_type, block, items in blocks:
+        if cache is None:
+            yield from serialize(block_to_html_node(block_type, block, basepath, items, links, terms))
+            continue
+        # Fingerprinted asset URLs end up in the HTML too, and minified HTML
+        # is cached apart from the regular kind
+        asset_map = features.asset_map()
+        context = basepath if asset_map is None else basepath + asset_map.digest
+        if features.minifying():
+            context += "\0minify"
+        key = cache.key(block_type, block, context)
+        entry = cache.get(key)
+        # Cached blocks aren't parsed again, so what they add to the link and
+        # search indexes is cached with them. Terms are only collected when
+        # they are asked for, so older entries may lack them.
+        if entry is None or (terms is not None and entry[2] is None):
+            block_links = []
+            block_terms = {} if terms is not None else None
+            html = "".join(serialize(block_to_html_node(block_type, block, basepath, items, block_links, block_terms)))
+            entry = (html, block_links, block_terms)
+            cache.put(key, html, block_links, block_terms)
+        html, block_links, block_terms = entry
+        if links is not None:
+            links.extend(block_links)
+        if terms is not None:
+            merge_terms(terms, block_terms)
+        yield html
+    yield "</div>"
+
+def serialize(node):
+    if features.minifying():
+        from minify import iter_html
+        return iter_html(node)
+    return node.iter_html()
+
+def block_to_html_node(block_type, block, basepath="/", items=None, links=None, terms=None):
+    if items is None and block_type in (BlockType.QUOTE, BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+        items = scan_block(block)[1]
+    if block_type == BlockType.PARAGRAPH:
+        # Process the text inside the paragraph for inline markdown
+        # This would convert things like **bold** to <b>bold</b>
+        normalized_text = " ".join(block.split())
+        children = text_to_children(normalized_text, basepath, links, terms)
+        
+        # Create the paragraph node with the processed children
+        paragraph_node = HTMLNode("p", None, children, EMPTY_PROPS)
+        
+        return paragraph_node
+    elif block_type == BlockType.HEADING:
+        # Count the leading # characters to determine heading level
+        heading_level = 0
+        for char in block:
+            if char == '#':
+                heading_level += 1
+            else:
+                break
+        
+        # Extract the heading text (removing the leading # and space)
+        heading_text = block[heading_level:].strip()
+        
+        # Convert heading text to HTML nodes
+        weight = 1
+        if terms is not None:
+            from search import heading_weight
+            weight = heading_weight(heading_level)
+        heading_children = text_to_children(heading_text, basepath, links, terms, weight)
+        
+        # Create the heading node
+        heading_node = HTMLNode(f"h{heading_level}", None, heading_children, EMPTY_PROPS)
+        
+        return heading_node
+    elif block_type == BlockType.CODE:
+        # Extract content between the triple backticks
+        lines = block.strip().split("\n")
+        
+        # Remove the opening and closing ```
+        content_lines = lines[1:-1]  
+        
+        # Join the content lines and add a trailing newline
+        content = "\n".join(line.lstrip() for line in content_lines) + "\n"
+        
+        # Create a text node (no inline parsing)
+        text_node = TextNode(content, TextType.TEXT)
+        if terms is not None:
+            from search import add_terms
+            add_terms(terms, content, 1)
+        
+        # Create the code node
+        code_node = HTMLNode("code", None, [text_node_to_html_node(text_node)], EMPTY_PROPS)
+        
+        # Wrap in a pre tag
+        pre_node = HTMLNode("pre", None, [code_node], EMPTY_PROPS)
+        return pre_node
+    elif block_type == BlockType.QUOTE:
+        # Join the quote lines, already stripped of their '>', with spaces
+        quote_content = " ".join(items)
+        
+        # Process the quote content for inline markdown
+        quote_children = text_to_children(quote_content.strip(), basepath, links, terms)
+        
+        # Create blockquote node
+        quote_node = HTMLNode("blockquote", None, quote_children, EMPTY_PROPS)
+        
+        return quote_node
+    elif block_type == BlockType.ORDERED_LIST or block_type == BlockType.UNORDERED_LIST:
+        tag = "ol" if block_type == BlockType.ORDERED_LIST else "ul"
+        list_node = HTMLNode(tag, None, [], EMPTY_PROPS)
+        
+        for item in items:
+            # Process inline markdown in the list item
+            item_children = text_to_children(item, basepath, links, terms)
             
-            # Add the unordered list to the parent
-            parent_node.children.append(list_node)
-    return parent_node
\ No newline at end of file
+            # Add list item to the list
+            list_node.children.append(HTMLNode("li", None, item_children, EMPTY_PROPS))
+        
+        return list_node
+    raise ValueError(f"Unknown block type {block_type}")
@@ -0,0 +1,334 @@
+from copystatic import copy_static
+from generate import generate_page, generate_pages_recursive, page_dest_path
+from template import load_template
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import ctypes
+import ctypes.util
+import functools
+import os
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+import traceback
+
+# Injected into every served page. It long-polls the server and reloads the
+# page as soon as a rebuild has finished.
+LIVE_RELOAD_SCRIPT = """<script>
+(function poll(version) {
+  fetch("/__livereload?version=" + version)
+    .then(function (response) { return response.text(); })
+    .then(function (next) {
+      if (version !== "" && next !== version) { location.reload(); } else { poll(next); }
+    })
+    .catch(function () { setTimeout(function () { poll(version); }, 1000); });
+})("");
+</script>"""
+
+class BuildState():
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def bump(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait_for_change(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    state = None
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == "/__livereload":
+            self.send_livereload(query)
+            return
+        file_path = self.translate_path(path)
+        if os.path.isdir(file_path):
+            file_path = os.path.join(file_path, "index.html")
+        if file_path.endswith(".html") and os.path.isfile(file_path) and path.endswith(("/", ".html")):
+            self.send_page(file_path)
+            return
+        super().do_GET()
+
+    def send_livereload(self, query):
+        version = query.partition("version=")[2]
+        current = self.state.version
+        if version == str(current):
+            current = self.state.wait_for_change(current, 25)
+        self.send_bytes(str(current).encode(), "text/plain")
+
+    def send_page(self, file_path):
+        with open(file_path, 'rb') as f:
+            html = f.read()
+        script = LIVE_RELOAD_SCRIPT.encode()
+        if b"</body>" in html:
+            html = html.replace(b"</body>", script + b"</body>", 1)
+        else:
+            html += script
+        self.send_bytes(html, "text/html; charset=utf-8")
+
+    def send_bytes(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(directory, port, state):
+    handler = functools.partial(LiveReloadHandler, directory=directory)
+    LiveReloadHandler.state = state
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {directory} on http://localhost:{port}/")
+    return server
+
+def snapshot(paths):
+    # Maps every file under the given paths to its (mtime, size)
+    files = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for root, _, names in os.walk(path):
+            for name in names:
+                file_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                files[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+# inotify(7) event bits, for everything that can change a file or what is in
+# a directory
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_IGNORED = 0x8000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+# struct inotify_event: wd, mask, cookie and the length of the name after it
+EVENT_HEADER = struct.Struct("iIII")
+
+def watched_directories(paths):
+    # Files are watched through their directory, since editors often save
+    # by writing a new file and renaming it over the old one
+    directories = []
+    for path in paths:
+        if not os.path.isdir(path):
+            directories.append(os.path.dirname(path) or ".")
+            continue
+        for root, _, _ in os.walk(path):
+            directories.append(root)
+    return directories
+
+class InotifyWaiter():
+    # Sleeps until the kernel reports a change under the watched paths, so
+    # an idle watch costs nothing however large the tree is. Events that
+    # follow within settle seconds are waited for too, so that a save which
+    # touches several files leads to one rebuild.
+    def __init__(self, settle):
+        self.settle = settle
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # watch descriptor -> directory
+        self.watches = {}
+
+    def watch(self, paths):
+        # Safe to call again after changes, new directories are added and
+        # ones already watched are skipped
+        watched = set(self.watches.values())
+        for directory in watched_directories(paths):
+            if directory in watched:
+                continue
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self.watches[wd] = directory
+                watched.add(directory)
+
+    def wait(self):
+        self.wait_for_events(None)
+        while self.wait_for_events(self.settle):
+            pass
+
+    def wait_for_events(self, timeout):
+        # Returns whether anything changed before the timeout
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        self.drain()
+        return True
+
+    def drain(self):
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return
+            position = 0
+            while position < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, position)
+                if mask & IN_IGNORED:
+                    # The directory is gone, watch it again if it comes back
+                    self.watches.pop(wd, None)
+                position += EVENT_HEADER.size + length
+
+    def changed(self):
+        pass
+
+    def idle(self):
+        pass
+
+    def close(self):
+        os.close(self.fd)
+
+class PollWaiter():
+    # For systems without inotify, and file systems that don't report
+    # changes, like network mounts. Polls quickly after a change, since more
+    # edits tend to follow, and backs off while nothing happens.
+    def __init__(self, interval, max_interval):
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+        self.delay = interval
+
+    def watch(self, paths):
+        pass
+
+    def wait(self):
+        time.sleep(self.delay)
+
+    def changed(self):
+        self.delay = self.interval
+
+    def idle(self):
+        self.delay = min(self.delay * 2, self.max_interval)
+
+    def close(self):
+        pass
+
+def change_waiter(interval, max_interval, poll=False):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWaiter(interval)
+        except (OSError, AttributeError):
+            pass
+    return PollWaiter(interval, max_interval)
+
+def changed_files(old, new):
+    changed = [path for path in new if old.get(path) != new[path]]
+    removed = [path for path in old if path not in new]
+    return changed, removed
+
+def is_inside(path, directory):
+    return path.startswith(os.path.join(directory, ""))
+
+class Watcher():
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, basepath="/"):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+
+    def build(self):
+        copy_static(self.static_dir, self.dest_dir)
+        generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, self.basepath)
+
+    def rebuild(self, changed, removed):
+        # Only the pages and assets that changed are rebuilt, unless the
+        # template or one of its partials changed, which affects every page
+        template_files = self.template_files()
+        if any(path in template_files for path in changed + removed):
+            generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, self.basepath)
+            changed = [path for path in changed if not is_inside(path, self.content_dir)]
+        for path in changed:
+            if is_inside(path, self.content_dir):
+                dest_path = page_dest_path(path, self.content_dir, self.dest_dir)
+                generate_page(path, self.template_path, dest_path, self.basepath)
+            elif is_inside(path, self.static_dir):
+                dest_path = os.path.join(self.dest_dir, os.path.relpath(path, self.static_dir))
+                print(f"Copying: {path}")
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                shutil.copy(path, dest_path)
+        for path in removed:
+            if is_inside(path, self.content_dir):
+                dest_path = page_dest_path(path, self.content_dir, self.dest_dir)
+            elif is_inside(path, self.static_dir):
+                dest_path = os.path.join(self.dest_dir, os.path.relpath(path, self.static_dir))
+            else:
+                continue
+            if os.path.exists(dest_path):
+                print(f"Removing {dest_path}")
+                os.remove(dest_path)
+
+    def template_files(self):
+        try:
+            return load_template(self.template_path, self.basepath).dependencies
+        except (OSError, ValueError):
+            return [self.template_path]
+
+    def watch(self, state, interval, max_interval=2.0, poll=False):
+        waiter = change_waiter(interval, max_interval, poll)
+        paths = [self.content_dir, self.static_dir] + self.template_files()
+        waiter.watch(paths)
+        files = snapshot(paths)
+        while True:
+            waiter.wait()
+            paths = [self.content_dir, self.static_dir] + self.template_files()
+            waiter.watch(paths)
+            new_files = snapshot(paths)
+            changed, removed = changed_files(files, new_files)
+            files = new_files
+            if not changed and not removed:
+                waiter.idle()
+                continue
+            waiter.changed()
+            start = time.perf_counter()
+            try:
+                self.rebuild(changed, removed)
+            except Exception:
+                # Keep watching, the next save will most likely fix it
+                traceback.print_exc()
+                continue
+            print(f"Rebuilt {len(changed) + len(removed)} changed files in {(time.perf_counter() - start) * 1000:.0f} ms")
+            state.bump()
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="main.py watch", description="Rebuild on changes and serve docs/ with live reload")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds to let a save settle before rebuilding, and between polls right after a change")
+    parser.add_argument("--max-interval", type=float, default=2.0, help="longest time between polls while nothing changes")
+    parser.add_argument("--poll", action="store_true", help="poll for changes even where inotify is available, e.g. on network mounts")
+    args = parser.parse_args(argv)
+
+    watcher = Watcher("content", "static", "template.html", "docs")
+    watcher.build()
+    state = BuildState()
+    server = serve(watcher.dest_dir, args.port, state)
+    try:
+        watcher.watch(state, args.interval, args.max_interval, args.poll)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,211 @@
+import features
+import hashlib
+import json
+import os
+import queue
+import threading
+
+# Writers take the HTML fragments of a page and put them on disk, returning
+# the sha256 of the bytes written. Output goes to a temporary file first and
+# is renamed into place, so a page is never seen half written.
+
+def temp_path(dest_path):
+    return f"{dest_path}.tmp{os.getpid()}.{threading.get_ident()}"
+
+def discard(path):
+    # Removes the temporary file of a write that failed partway, e.g. when
+    # rendering the page raised
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class ChangeList():
+    # Collects the output files a build wrote or removed, so that deploy
+    # tooling only has to upload and invalidate those
+    def __init__(self):
+        self.written = set()
+        self.removed = set()
+
+    def add_written(self, path):
+        self.written.add(os.path.normpath(path))
+        self.removed.discard(os.path.normpath(path))
+
+    def add_removed(self, path):
+        self.removed.add(os.path.normpath(path))
+        self.written.discard(os.path.normpath(path))
+
+    def save(self, path, root):
+        # Paths are written relative to the output directory
+        def relative(paths):
+            return sorted(os.path.relpath(item, root).replace(os.sep, "/") for item in paths)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({"written": relative(self.written), "removed": relative(self.removed)}, f, indent=1)
+
+class StreamWriter():
+    # Writes fragments to the file as they are produced, so a page is never
+    # held in memory as a whole. Given the hashes of the pages already on disk
+    # (from the manifest), a page that renders to the same bytes is left
+    # untouched, keeping its mtime.
+    def __init__(self, atomic=True, known_hashes=None, changes=None):
+        self.atomic = atomic
+        self.known_hashes = known_hashes or {}
+        self.changes = changes
+        self.created_dirs = set()
+        self.written = 0
+        self.skipped = 0
+
+    def open(self, path):
+        # Directories are only created the first time they are seen
+        directory = os.path.dirname(path)
+        if directory not in self.created_dirs:
+            os.makedirs(directory or ".", exist_ok=True)
+            self.created_dirs.add(directory)
+        try:
+            return open(path, 'wb')
+        except FileNotFoundError:
+            # The directory was removed since, e.g. by copy_static
+            os.makedirs(directory, exist_ok=True)
+            return open(path, 'wb')
+
+    def unchanged(self, dest_path, digest):
+        return self.known_hashes.get(dest_path) == digest and os.path.exists(dest_path)
+
+    def finish(self, path, dest_path, digest):
+        # Moves a written temporary file into place, or drops it when the
+        # page did not change
+        if self.unchanged(dest_path, digest):
+            if path != dest_path:
+                os.remove(path)
+            self.skipped += 1
+            return
+        if path != dest_path:
+            os.replace(path, dest_path)
+        self.written += 1
+        if self.changes is not None:
+            self.changes.add_written(dest_path)
+
+    def write(self, dest_path, chunks):
+        # Without atomic writes the old file is truncated right away, so it
+        # can't be compared against
+        path = temp_path(dest_path) if self.atomic else dest_path
+        digest = hashlib.sha256()
+        try:
+            with self.open(path) as f:
+                if features.active_profiler() is None:
+                    for chunk in chunks:
+                        data = chunk.encode()
+                        f.write(data)
+                        digest.update(data)
+                else:
+                    for chunk in chunks:
+                        with features.stage("write"):
+                            data = chunk.encode()
+                            f.write(data)
+                            digest.update(data)
+        except BaseException:
+            if path != dest_path:
+                discard(path)
+            raise
+        digest = digest.hexdigest()
+        self.finish(path, dest_path, digest)
+        return digest
+
+    def submit(self, dest_path, data, digest):
+        # Writes a page that was already encoded, e.g. by a worker process
+        if self.unchanged(dest_path, digest):
+            self.skipped += 1
+            return
+        self.write_bytes(dest_path, data, digest)
+
+    def write_bytes(self, dest_path, data, digest):
+        path = temp_path(dest_path) if self.atomic else dest_path
+        try:
+            with self.open(path) as f:
+                f.write(data)
+        except BaseException:
+            if path != dest_path:
+                discard(path)
+            raise
+        self.finish(path, dest_path, digest)
+
+    def remove(self, dest_path):
+        os.remove(dest_path)
+        if self.changes is not None:
+            self.changes.add_removed(dest_path)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+        print(f"Wrote {self.written} pages, {self.skipped} unchanged")
+
+class BufferWriter():
+    # Encodes a page into bytes without writing it, for worker processes that
+    # hand their pages to a writer in the parent
+    def __init__(self):
+        self.pages = {}
+
+    def write(self, dest_path, chunks):
+        with features.stage("write"):
+            data = "".join(chunks).encode()
+        self.pages[dest_path] = data
+        return hashlib.sha256(data).hexdigest()
+
+    def take(self, dest_path):
+        return self.pages.pop(dest_path, None)
+
+class ThreadedWriter(StreamWriter):
+    # Pages are encoded by the caller and queued, and a background thread
+    # does all of the file system work: creating directories and renaming
+    # changed pages into place. On slow or network mounted volumes rendering
+    # carries on while pages are written.
+    def __init__(self, atomic=True, known_hashes=None, changes=None, max_pending=64):
+        super().__init__(atomic, known_hashes, changes)
+        self.pending = queue.Queue(max_pending)
+        self.errors = []
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, dest_path, chunks):
+        with features.stage("write"):
+            data = "".join(chunks).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        self.submit(dest_path, data, digest)
+        return digest
+
+    def submit(self, dest_path, data, digest):
+        # Unchanged pages are dropped right away, without a trip to the thread
+        if self.unchanged(dest_path, digest):
+            self.skipped += 1
+            return
+        self.pending.put((dest_path, data, digest))
+
+    def run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                self.pending.task_done()
+                return
+            dest_path, data, digest = item
+            try:
+                self.write_bytes(dest_path, data, digest)
+            except OSError as error:
+                self.errors.append((dest_path, error))
+            self.pending.task_done()
+
+    def flush(self):
+        # Waits for every queued page to be on disk
+        self.pending.join()
+        if self.errors:
+            errors = self.errors
+            self.errors = []
+            dest_path, error = errors[0]
+            raise Exception(f"Failed to write {len(errors)} pages, first was {dest_path}: {error}")
+
+    def close(self):
+        self.pending.put(None)
+        self.thread.join()
+        super().close()